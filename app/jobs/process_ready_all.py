@@ -94,8 +94,11 @@ def main() -> int:
                 # If there are pending items and sending is enabled, declare them; otherwise skip sending
                 # Additional guard: skip when all progress is missing (likely provider API misconfig)
                 if items and send and not all_progress_missing:
-                    dec = chain_writer.declare_results(cid, items, chunk_size=chunk_size, send=True)
-                    declared_now = not dec.get("dry_run", True)
+                    # Broadcast every chunk first, then wait on all receipts; a revert raises before archiving
+                    dec = chain_writer.declare_results(cid, items, chunk_size=chunk_size, send=True, wait_receipts=False)
+                    if not dec.get("dry_run", True):
+                        dec["receipts"] = chain_writer.collect_receipts(dec.get("tx_hashes") or [])
+                        declared_now = True
                 elif items and send and all_progress_missing:
                     # Encode a clear reason in the declare preview
                     dec = {
@@ -1,25 +1,71 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, List, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
+from eth_utils.abi import get_abi_output_types
 from web3 import Web3
 from web3.contract import Contract
 
 from app.core.config import settings
 
+# Multicall3 is deployed at the same address on Base and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+_MULTICALL3_ABI = [
+    {
+        "name": "aggregate3",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+            }
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+            }
+        ],
+    }
+]
+
+
+@lru_cache(maxsize=8)
+def _load_abi_resolved(path: str) -> List[Dict[str, Any]]:
+    raw = json.loads(Path(path).read_bytes())
+    abi = raw.get("abi") if isinstance(raw, dict) and "abi" in raw else raw
+    if not isinstance(abi, list):
+        raise RuntimeError("Invalid ABI JSON: expected list or artifact with 'abi' key")
+    return abi
+
+
+def load_abi(abi_path: str) -> List[Dict[str, Any]]:
+    """Load a contract ABI (plain list or artifact with an 'abi' key), parsed once per path.
+
+    The returned list is shared between callers and must not be mutated.
+    """
+    return _load_abi_resolved(str(Path(abi_path).resolve()))
+
 
 class ChainReader:
     def __init__(self, rpc_url: str, contract_address: str, abi_path: str):
         self.w3 = Web3(Web3.HTTPProvider(rpc_url))
         # Resolve ABI path to avoid CWD issues and support artifact objects
         self.abi_path = str(Path(abi_path).resolve())
-        with Path(self.abi_path).open("r", encoding="utf-8") as f:
-            raw = json.load(f)
-        abi = raw.get("abi") if isinstance(raw, dict) and "abi" in raw else raw
-        if not isinstance(abi, list):
-            raise RuntimeError("Invalid ABI JSON: expected list or artifact with 'abi' key")
+        abi = load_abi(self.abi_path)
         self.contract_address = Web3.to_checksum_address(contract_address)
         self.contract: Contract = self.w3.eth.contract(address=self.contract_address, abi=abi)
 
@@ -30,6 +76,14 @@ class ChainReader:
         return cls(settings.WEB3_RPC_URL, settings.MOTIFY_CONTRACT_ADDRESS, settings.MOTIFY_CONTRACT_ABI_PATH)
 
     def get_all_challenges(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        return list(self.iter_challenges(limit=limit))
+
+    def iter_challenges(self, limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield parsed challenges one at a time.
+
+        getAllChallenges has no offset parameter, so the raw tuples arrive in one call;
+        parsing into dicts is deferred so consumers can process them in pages.
+        """
         try:
             res = self.contract.functions.getAllChallenges(limit).call()
         except Exception as e:
@@ -51,7 +105,6 @@ class ChainReader:
                 "abi_path": self.abi_path,
             }
             raise RuntimeError(f"getAllChallenges call failed; diagnostics: {diag}")
-        parsed: List[Dict[str, Any]] = []
         for item in res:
             # Support both old and new ABI layouts
             # Old: [id,recipient,start,end,isPrivate,apiType,goalType,goalAmount,description,totalDonation,resultsFinalized,participantCount]
@@ -67,7 +120,7 @@ class ChainReader:
             results_finalized = item[11] if is_new else item[10]
             participant_count = item[12] if is_new else item[11]
 
-            parsed.append({
+            yield {
                 "challenge_id": int(item[0]),
                 "recipient": item[1],
                 "start_time": int(item[2]),
@@ -81,8 +134,7 @@ class ChainReader:
                 "total_donation_amount": int(total_donation),
                 "results_finalized": bool(results_finalized),
                 "participant_count": int(participant_count),
-            })
-        return parsed
+            }
 
     def get_challenge_detail(self, challenge_id: int) -> Dict[str, Any]:
         try:
@@ -106,54 +158,44 @@ class ChainReader:
                 "challenge_id": int(challenge_id),
             }
             raise RuntimeError(f"getChallengeById call failed; diagnostics: {diag}")
-        # Old: (id,recipient,start,end,isPrivate,apiType,goalType,goalAmount,description,totalDonation,resultsFinalized,participants[])
-        # New: (id,recipient,start,end,isPrivate,name,apiType,goalType,goalAmount,description,totalDonation,resultsFinalized,participants[])
-        length = len(d)
-        is_new = length >= 13
-        name = d[5] if is_new else ""
-        api_type = d[6] if is_new else d[5]
-        goal_type = d[7] if is_new else d[6]
-        goal_amount = d[8] if is_new else d[7]
-        description = d[9] if is_new else d[8]
-        total_donation = d[10] if is_new else d[9]
-        results_finalized = d[11] if is_new else d[10]
-        participants_idx = 12 if is_new else 11
-
-        participants = []
-        for p in d[participants_idx]:
-            # Old: (participantAddress, amount, refundPercentage, resultDeclared)
-            # New: (participantAddress, initialAmount, amount, refundPercentage, resultDeclared)
-            if len(p) >= 5:
-                participants.append({
-                    "participant_address": p[0],
-                    "initial_amount": int(p[1]),
-                    "amount": int(p[2]),
-                    "refund_percentage": int(p[3]),
-                    "result_declared": bool(p[4]),
-                })
-            else:
-                participants.append({
-                    "participant_address": p[0],
-                    "amount": int(p[1]),
-                    "refund_percentage": int(p[2]),
-                    "result_declared": bool(p[3]),
-                })
+        return _parse_challenge_detail(d)
 
-        return {
-            "challenge_id": int(d[0]),
-            "recipient": d[1],
-            "start_time": int(d[2]),
-            "end_time": int(d[3]),
-            "is_private": bool(d[4]),
-            "name": name,
-            "api_type": api_type,
-            "goal_type": goal_type,
-            "goal_amount": int(goal_amount),
-            "description": description,
-            "total_donation_amount": int(total_donation),
-            "results_finalized": bool(results_finalized),
-            "participants": participants,
-        }
+    def get_challenge_details(self, challenge_ids: List[int], batch_size: int = 50) -> Dict[int, Dict[str, Any]]:
+        """Read several challenges with one Multicall3 aggregate3 eth_call per batch.
+
+        Returns {challenge_id: detail} in get_challenge_detail's shape. Challenges whose
+        sub-call reverted are omitted; callers fall back to get_challenge_detail for those.
+        """
+        ids = [int(cid) for cid in challenge_ids]
+        if not ids:
+            return {}
+        fn_abi = self.contract.get_function_by_name("getChallengeById").abi
+        output_types = get_abi_output_types(fn_abi)
+        multicall = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=_MULTICALL3_ABI)
+
+        out: Dict[int, Dict[str, Any]] = {}
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            calls = [
+                (self.contract_address, True, self.contract.encode_abi("getChallengeById", args=[cid]))
+                for cid in batch
+            ]
+            try:
+                results = multicall.functions.aggregate3(calls).call()
+            except Exception as e:
+                diag = {
+                    "error": str(e),
+                    "multicall_address": MULTICALL3_ADDRESS,
+                    "contract_address": self.contract_address,
+                    "challenge_ids": batch,
+                }
+                raise RuntimeError(f"Multicall3 aggregate3 failed; diagnostics: {diag}")
+            for cid, (success, data) in zip(batch, results):
+                if not success or not data:
+                    continue
+                d = self.w3.codec.decode(output_types, data)[0]
+                out[cid] = _checksum_detail(_parse_challenge_detail(d))
+        return out
 
     def sanity(self) -> Dict[str, Any]:
         """Return basic diagnostics for easier troubleshooting."""
@@ -173,3 +215,63 @@ class ChainReader:
             "contract_code_len": code_len,
             "abi_path": self.abi_path,
         }
+
+
+def _checksum_detail(detail: Dict[str, Any]) -> Dict[str, Any]:
+    # Raw codec output has lowercase addresses; match what contract .call() returns so cached
+    # participant_address keys stay identical across the Multicall and per-challenge paths
+    detail["recipient"] = Web3.to_checksum_address(detail["recipient"])
+    for p in detail["participants"]:
+        p["participant_address"] = Web3.to_checksum_address(p["participant_address"])
+    return detail
+
+
+def _parse_challenge_detail(d: Any) -> Dict[str, Any]:
+    # Old: (id,recipient,start,end,isPrivate,apiType,goalType,goalAmount,description,totalDonation,resultsFinalized,participants[])
+    # New: (id,recipient,start,end,isPrivate,name,apiType,goalType,goalAmount,description,totalDonation,resultsFinalized,participants[])
+    length = len(d)
+    is_new = length >= 13
+    name = d[5] if is_new else ""
+    api_type = d[6] if is_new else d[5]
+    goal_type = d[7] if is_new else d[6]
+    goal_amount = d[8] if is_new else d[7]
+    description = d[9] if is_new else d[8]
+    total_donation = d[10] if is_new else d[9]
+    results_finalized = d[11] if is_new else d[10]
+    participants_idx = 12 if is_new else 11
+
+    participants = []
+    for p in d[participants_idx]:
+        # Old: (participantAddress, amount, refundPercentage, resultDeclared)
+        # New: (participantAddress, initialAmount, amount, refundPercentage, resultDeclared)
+        if len(p) >= 5:
+            participants.append({
+                "participant_address": p[0],
+                "initial_amount": int(p[1]),
+                "amount": int(p[2]),
+                "refund_percentage": int(p[3]),
+                "result_declared": bool(p[4]),
+            })
+        else:
+            participants.append({
+                "participant_address": p[0],
+                "amount": int(p[1]),
+                "refund_percentage": int(p[2]),
+                "result_declared": bool(p[3]),
+            })
+
+    return {
+        "challenge_id": int(d[0]),
+        "recipient": d[1],
+        "start_time": int(d[2]),
+        "end_time": int(d[3]),
+        "is_private": bool(d[4]),
+        "name": name,
+        "api_type": api_type,
+        "goal_type": goal_type,
+        "goal_amount": int(goal_amount),
+        "description": description,
+        "total_donation_amount": int(total_donation),
+        "results_finalized": bool(results_finalized),
+        "participants": participants,
+    }
@@ -1,23 +1,60 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 from web3 import Web3
 
 from app.core.config import settings
+from app.services.chain_reader import load_abi
+
+
+# Optional PoA middleware (e.g., some L2s/PoA chains). Resolved once; tolerant to web3 version differences.
+try:
+    # web3.py v5 style
+    from web3.middleware import geth_poa_middleware as _POA_MIDDLEWARE  # type: ignore
+except Exception:
+    try:
+        # web3.py v6+ style
+        from web3.middleware.proof_of_authority import ExtraDataToPOAMiddleware as _POA_MIDDLEWARE  # type: ignore
+    except Exception:
+        # No-op if neither is available
+        _POA_MIDDLEWARE = None
+
+
+@lru_cache(maxsize=4)
+def _web3(rpc_url: str) -> Web3:
+    """Web3 client per RPC URL, built once with the PoA middleware injected."""
+    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    if _POA_MIDDLEWARE is not None:
+        try:
+            w3.middleware_onion.inject(_POA_MIDDLEWARE, layer=0)
+        except Exception:
+            pass
+    return w3
 
 
 def _load_contract(w3: Web3):
-    import json
-    with open(settings.MOTIFY_CONTRACT_ABI_PATH, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    abi = raw.get("abi") if isinstance(raw, dict) and "abi" in raw else raw
-    return w3.eth.contract(address=Web3.to_checksum_address(settings.MOTIFY_CONTRACT_ADDRESS), abi=abi)
+    abi = load_abi(settings.MOTIFY_CONTRACT_ABI_PATH)
+    return w3.eth.contract(address=_checksum(settings.MOTIFY_CONTRACT_ADDRESS), abi=abi)
+
+
+@lru_cache(maxsize=16384)
+def _checksum_lc(addr_lc: str) -> str:
+    return Web3.to_checksum_address(addr_lc)
+
+
+def _checksum(addr: str) -> str:
+    # Normalize before caching so differently-cased inputs share one keccak computation
+    return _checksum_lc(str(addr).lower())
 
 
 def _ppm_to_bps(ppm: int) -> int:
-    # 1 bps = 10,000 ppm; bps = round(ppm / 100)
-    return int(round(int(ppm) / 100))
+    # 1 bps = 100 ppm; bps = round(ppm / 100), half-to-even like round(), in integer math
+    q, r = divmod(int(ppm), 100)
+    if r > 50 or (r == 50 and q % 2):
+        q += 1
+    return q
 
 
 def _fee_params(w3: Web3) -> Dict[str, int]:
@@ -88,51 +125,159 @@ def _fee_params(w3: Web3) -> Dict[str, int]:
         return {}
 
 
+def _fee_mode(fp: Dict[str, int]) -> str:
+    if "maxFeePerGas" in fp or "maxPriorityFeePerGas" in fp:
+        # If env caps set, assume env mode, else auto
+        return "eip1559-env" if (settings.MAX_FEE_GWEI is not None) else "eip1559-auto"
+    if "gasPrice" in fp:
+        return "legacy-fallback"
+    return "unknown"
+
+
+def _gas_limit(w3: Web3, tx: Dict[str, Any]) -> int:
+    # Gas limit estimation if not provided
+    if settings.GAS_LIMIT is not None:
+        return int(settings.GAS_LIMIT)
+    try:
+        return int(w3.eth.estimate_gas(tx))  # may raise
+    except Exception:
+        # fallback gas limit; caller can override via env
+        return 1_000_000
+
+
+# (output key, receipt key aliases across web3 versions, default when absent)
+_RECEIPT_KEYS = (
+    ("status", ("status",), 0),
+    ("gasUsed", ("gasUsed", "gas_used"), 0),
+    ("blockNumber", ("blockNumber", "block_number"), 0),
+    # Some providers expose effectiveGasPrice; include when available
+    ("effectiveGasPrice", ("effectiveGasPrice", "effective_gas_price"), None),
+)
+
+
+def _receipt_summary(tx_hash_hex: str, receipt: Any) -> Dict[str, Any]:
+    # Receipts are AttributeDict mappings; normalize keys with one membership test per alias
+    r = receipt if isinstance(receipt, dict) else dict(receipt)
+    out: Dict[str, Any] = {"transactionHash": tx_hash_hex}
+    for key, aliases, default in _RECEIPT_KEYS:
+        out[key] = next((int(r[k]) for k in aliases if r.get(k) is not None), default)
+    return out
+
+
+def _checked_receipt(tx_hash_hex: str, receipt: Any) -> Dict[str, Any]:
+    """_receipt_summary that raises when the tx reverted, so callers never report a failed declare as sent."""
+    summary = _receipt_summary(tx_hash_hex, receipt)
+    if summary["status"] != 1:
+        raise RuntimeError(f"declareResults tx reverted; diagnostics: {summary}")
+    return summary
+
+
+def _send_chunks_batched(
+    w3: Web3,
+    contract: Any,
+    account: Any,
+    challenge_id: int,
+    chunks: List[Any],
+    nonce: int,
+) -> Optional[Dict[str, Any]]:
+    """Sign every chunk's declareResults tx up front and broadcast them in one JSON-RPC batch.
+
+    Uses consecutive nonces and one fee snapshot. Every chunk is built with build_transaction, whose
+    gas estimate raises on a revert (e.g. already-declared participants) before anything is signed.
+    The batch goes straight to provider.make_batch_request (web3's batch_requests() refuses
+    eth_sendRawTransaction).
+    Returns {tx_hashes (HexBytes), used_fee_params}, or None when nothing was accepted (provider
+    without batch support, batch rejected as a whole) so the caller can fall back to per-tx sends.
+    Raises if the batch was only partially accepted; the next run reconciles from on-chain state.
+    """
+    make_batch = getattr(w3.provider, "make_batch_request", None)
+    if not callable(make_batch):
+        # web3 < 7 providers cannot batch; skip before spending any RPCs on signing
+        return None
+    fee = _fee_params(w3)
+    if not fee:
+        return None
+    signed_txs = []
+    for i, (participants, percentages) in enumerate(chunks):
+        # Strict preflight: no fixed-gas fallback here, a reverting chunk must stop the whole send
+        tx = contract.functions.declareResults(int(challenge_id), participants, percentages).build_transaction({
+            "from": account.address,
+            "nonce": nonce + i,
+            **fee,
+        })
+        if settings.GAS_LIMIT is not None:
+            tx["gas"] = int(settings.GAS_LIMIT)
+        signed_txs.append(account.sign_transaction(tx))
+
+    batch = []
+    for signed in signed_txs:
+        raw_tx = getattr(signed, "rawTransaction", None) or getattr(signed, "raw_transaction", None)
+        if raw_tx is None:
+            raise RuntimeError("SignedTransaction missing raw transaction bytes (web3 compat issue)")
+        batch.append(("eth_sendRawTransaction", [Web3.to_hex(raw_tx)]))
+
+    try:
+        responses = make_batch(batch)
+    except Exception as e:
+        # Transport failure: the node may still have received the batch, so check what landed
+        accepted = []
+        for signed in signed_txs:
+            try:
+                w3.eth.get_transaction(signed.hash)
+                accepted.append(Web3.to_hex(signed.hash))
+            except Exception:
+                pass
+        if not accepted:
+            return None
+        diag = {"error": str(e), "accepted_tx_hashes": accepted, "chunks": len(chunks)}
+        raise RuntimeError(f"declareResults batch partially accepted; diagnostics: {diag}")
+
+    # A single error object (not a list) means the batch itself was rejected
+    if not isinstance(responses, list):
+        return None
+    errors = [r.get("error") for r in responses]
+    if all(errors):
+        return None
+    if any(errors):
+        diag = {
+            "errors": errors,
+            "accepted_tx_hashes": [Web3.to_hex(s.hash) for s, err in zip(signed_txs, errors) if not err],
+            "chunks": len(chunks),
+        }
+        raise RuntimeError(f"declareResults batch partially accepted; diagnostics: {diag}")
+
+    used = {"params": {k: int(v) for k, v in fee.items()}, "mode": _fee_mode(fee)}
+    return {
+        "tx_hashes": [signed.hash for signed in signed_txs],
+        "used_fee_params": [used for _ in signed_txs],
+    }
+
+
 def declare_results(
     challenge_id: int,
     items: List[Dict[str, Any]],
     *,
     chunk_size: int = 200,
     send: bool = False,
+    wait_receipts: bool = True,
 ) -> Dict[str, Any]:
     """Declare results on-chain.
 
     items: [{ user, stake_minor_units, percent_ppm }]
     Converts percent_ppm -> basis points (0..10_000) as per contract expectation.
     If send=False, returns payload preview without broadcasting.
+    If wait_receipts=False, returns right after broadcasting with receipts=None;
+    use `sent_txs` / collect_receipts() to poll for them later.
     """
     if not (settings.WEB3_RPC_URL and settings.MOTIFY_CONTRACT_ADDRESS and settings.MOTIFY_CONTRACT_ABI_PATH):
         raise RuntimeError("Web3 not configured for chain writer")
 
-    w3 = Web3(Web3.HTTPProvider(settings.WEB3_RPC_URL))
-    # Optional PoA middleware (e.g., some L2s/PoA chains). Be tolerant to web3 version differences.
-    try:
-        # web3.py v5 style
-        from web3.middleware import geth_poa_middleware  # type: ignore
-        try:
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-        except Exception:
-            pass
-    except Exception:
-        try:
-            # web3.py v6 style
-            from web3.middleware.proof_of_authority import ExtraDataToPOAMiddleware  # type: ignore
-            try:
-                w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-            except Exception:
-                pass
-        except Exception:
-            # No-op if neither is available
-            pass
-
+    w3 = _web3(settings.WEB3_RPC_URL)
     contract = _load_contract(w3)
 
     # Build arrays
-    addrs: List[str] = []
-    bps: List[int] = []
-    for it in items:
-        addrs.append(Web3.to_checksum_address(it["user"]))
-        bps.append(_ppm_to_bps(int(it["percent_ppm"])) )
+    addrs: List[str] = [_checksum(it["user"]) for it in items]
+    bps: List[int] = [_ppm_to_bps(it["percent_ppm"]) for it in items]
 
     # Chunking
     chunks = []
@@ -149,13 +294,6 @@ def declare_results(
 
     # Preview current fee params (for artifacts/visibility)
     fee_preview = _fee_params(w3)
-    def _fee_mode(fp: Dict[str, int]) -> str:
-        if "maxFeePerGas" in fp or "maxPriorityFeePerGas" in fp:
-            # If env caps set, assume env mode, else auto
-            return "eip1559-env" if (settings.MAX_FEE_GWEI is not None) else "eip1559-auto"
-        if "gasPrice" in fp:
-            return "legacy-fallback"
-        return "unknown"
     fee_preview_mode = _fee_mode(fee_preview)
 
     if not send:
@@ -167,7 +305,8 @@ def declare_results(
     account = w3.eth.account.from_key(settings.PRIVATE_KEY)
 
     tx_hashes: List[str] = []
-    receipts: List[Dict[str, Any]] = []
+    sent_txs: List[Dict[str, Any]] = []
+    receipts: Optional[List[Dict[str, Any]]] = [] if wait_receipts else None
     used_fee_params: List[Dict[str, Any]] = []
     # Use 'pending' to include mempool txs and avoid nonce-too-low
     try:
@@ -175,7 +314,29 @@ def declare_results(
     except Exception:
         nonce = w3.eth.get_transaction_count(account.address)
 
-    for (participants, percentages) in chunks:
+    # Several chunks: pre-sign all and broadcast in one JSON-RPC batch
+    if len(chunks) > 1:
+        batched = _send_chunks_batched(w3, contract, account, challenge_id, chunks, nonce)
+        if batched is not None:
+            for batch_no, tx_hash in enumerate(batched["tx_hashes"]):
+                tx_hash_hex = tx_hash.hex()
+                tx_hashes.append(tx_hash_hex)
+                sent_txs.append({"tx_hash": tx_hash_hex, "batch_no": batch_no, "nonce": nonce + batch_no})
+            if receipts is not None:
+                for tx_hash in batched["tx_hashes"]:
+                    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+                    receipts.append(_checked_receipt(tx_hash.hex(), receipt))
+            return {
+                "dry_run": False,
+                "payload": payload,
+                "tx_hashes": tx_hashes,
+                "sent_txs": sent_txs,
+                "receipts": receipts,
+                "used_fee_params": batched["used_fee_params"],
+                "fee_params_preview_mode": fee_preview_mode,
+            }
+
+    for batch_no, (participants, percentages) in enumerate(chunks):
         fee = _fee_params(w3)
         used_fee_params.append({
             "params": {k: int(v) for k, v in fee.items()},
@@ -190,15 +351,7 @@ def declare_results(
                 "nonce": nonce,
                 **fee,
             })
-            # Gas limit estimation if not provided
-            if settings.GAS_LIMIT is not None:
-                tx["gas"] = int(settings.GAS_LIMIT)
-            else:
-                try:
-                    tx["gas"] = w3.eth.estimate_gas(tx)  # may raise
-                except Exception:
-                    # fallback gas limit; caller can override via env
-                    tx["gas"] = 1_000_000
+            tx["gas"] = _gas_limit(w3, tx)
 
             signed = account.sign_transaction(tx)
             raw_tx = getattr(signed, "rawTransaction", None) or getattr(signed, "raw_transaction", None)
@@ -208,28 +361,12 @@ def declare_results(
                 tx_hash = w3.eth.send_raw_transaction(raw_tx)
                 tx_hash_hex = tx_hash.hex()
                 tx_hashes.append(tx_hash_hex)
+                sent_txs.append({"tx_hash": tx_hash_hex, "batch_no": batch_no, "nonce": nonce})
 
-                # Wait for receipt (optional; could be async in production)
-                receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-                # Normalize keys across different web3 versions
-                r_status = int(getattr(receipt, "status", getattr(receipt, "status", 0)))
-                r_gas_used = getattr(receipt, "gasUsed", None)
-                if r_gas_used is None:
-                    r_gas_used = getattr(receipt, "gas_used", None)
-                r_block = getattr(receipt, "blockNumber", None)
-                if r_block is None:
-                    r_block = getattr(receipt, "block_number", None)
-                # Some providers expose effectiveGasPrice; include when available
-                eff = getattr(receipt, "effectiveGasPrice", None)
-                if eff is None:
-                    eff = getattr(receipt, "effective_gas_price", None)
-                receipts.append({
-                    "transactionHash": tx_hash_hex,
-                    "status": int(r_status if r_status is not None else 0),
-                    "gasUsed": int(r_gas_used if r_gas_used is not None else 0),
-                    "blockNumber": int(r_block if r_block is not None else 0),
-                    "effectiveGasPrice": int(eff) if eff is not None else None,
-                })
+                # Wait for receipt unless the caller polls later
+                if receipts is not None:
+                    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+                    receipts.append(_checked_receipt(tx_hash_hex, receipt))
                 nonce += 1
                 break
             except Exception as e:
@@ -248,7 +385,25 @@ def declare_results(
         "dry_run": False,
         "payload": payload,
         "tx_hashes": tx_hashes,
+        "sent_txs": sent_txs,
         "receipts": receipts,
         "used_fee_params": used_fee_params,
         "fee_params_preview_mode": fee_preview_mode,
     }
+
+
+def collect_receipts(tx_hashes: List[str], *, timeout: float = 120, poll_latency: float = 5.0) -> List[Dict[str, Any]]:
+    """Wait for receipts of txs sent with declare_results(..., wait_receipts=False).
+
+    Polls every `poll_latency` seconds; returns normalized receipts in input order.
+    Raises on the first reverted tx, like declare_results does when it waits itself.
+    """
+    if not settings.WEB3_RPC_URL:
+        raise RuntimeError("Web3 not configured for chain writer")
+    w3 = _web3(settings.WEB3_RPC_URL)
+    out: List[Dict[str, Any]] = []
+    for tx_hash_hex in tx_hashes:
+        tx_hash = tx_hash_hex if str(tx_hash_hex).startswith("0x") else f"0x{tx_hash_hex}"
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout, poll_latency=poll_latency)
+        out.append(_checked_receipt(str(tx_hash_hex), receipt))
+    return out
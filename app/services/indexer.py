@@ -1,11 +1,45 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from typing import Any, Dict, List, Optional
 
 from app.core.config import settings
 from app.models.db import SupabaseDAL
 from app.services.chain_reader import ChainReader
-from app.services.progress import fetch_progress, ratio_to_ppm
+from app.services.progress import addr_key, fetch_progress, fetch_progress_batch, ratio_to_ppm
+
+
+# Challenge fields copied verbatim from ChainReader output into chain_challenges rows
+_FIELDS = (
+    "challenge_id",
+    "recipient",
+    "start_time",
+    "end_time",
+    "is_private",
+    "api_type",
+    "goal_type",
+    "goal_amount",
+    "description",
+    "total_donation_amount",
+    "results_finalized",
+    "participant_count",
+)
+_get_fields = itemgetter(*_FIELDS)
+
+# (contract_address, challenge_id) pairs seen in finished_challenges. Archiving is
+# one-way, so positives can be remembered for the life of the process.
+_KNOWN_ARCHIVED: set[tuple[str, int]] = set()
+
+# Rows per chain_challenges upsert / archived lookup while indexing
+_UPSERT_PAGE = 500
+
+# Rows per chain_participants page; matches Supabase's default PostgREST max-rows
+_PARTICIPANT_PAGE = 1000
+
+# Max concurrent getChallengeById reads when caching participants of ready challenges
+_CACHE_WORKERS = 8
 
 
 def _ensure_web3_configured() -> None:
@@ -13,9 +47,25 @@ def _ensure_web3_configured() -> None:
         raise RuntimeError("Web3 not configured")
 
 
+@lru_cache(maxsize=1)
+def _reader() -> ChainReader:
+    """Process-wide ChainReader, so Web3/contract setup and the RPC session are reused."""
+    _ensure_web3_configured()
+    reader = ChainReader.from_settings()
+    if not reader:
+        raise RuntimeError("Failed to init ChainReader")
+    return reader
+
+
+def _reset_reader() -> None:
+    """Drop the cached ChainReader (tests / config reload)."""
+    _reader.cache_clear()
+
+
 def _get_resp_data(resp: Any) -> List[Dict[str, Any]]:
-    if hasattr(resp, "data"):
-        return resp.data or []
+    data = getattr(resp, "data", None)
+    if data is not None:
+        return data
     md = getattr(resp, "model_dump", None)
     if callable(md):
         d = md()
@@ -24,75 +74,83 @@ def _get_resp_data(resp: Any) -> List[Dict[str, Any]]:
 
 
 def fetch_and_cache_ended_challenges(limit: int = 1000, only_ready_to_end: bool = True, exclude_finished: bool = True) -> Dict[str, Any]:
-    """Fetch challenges from chain and cache ended & not-finalized ones into Supabase."""
-    _ensure_web3_configured()
-    reader = ChainReader.from_settings()
-    if not reader:
-        raise RuntimeError("Failed to init ChainReader")
+    """Fetch challenges from chain and cache ended & not-finalized ones into Supabase.
+
+    Runs as a single pass over the chain results, checking archived status and
+    upserting in pages of _UPSERT_PAGE rows so at most one page is held in memory.
+    """
+    reader = _reader()
 
     dal = SupabaseDAL.from_env()
     if not dal:
         raise RuntimeError("Supabase not configured")
 
-    items = reader.get_all_challenges(limit=limit)
-
     from time import time as now
     ts = int(now())
-    filtered = [c for c in items if (not only_ready_to_end) or (c["end_time"] <= ts and not c["results_finalized"])]
-
-    # Optionally skip already-archived challenges (present in finished_challenges)
-    archived_ids: set[int] = set()
-    if exclude_finished and filtered:
-        try:
-            ids = [int(c["challenge_id"]) for c in filtered]
-            resp_arch = (
-                dal.client
-                .table("finished_challenges")
-                .select("challenge_id")
-                .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
-                .in_("challenge_id", ids)
-                .execute()
-            )
-            archived_rows = _get_resp_data(resp_arch)
-            archived_ids = {int(r["challenge_id"]) for r in archived_rows}
-        except Exception:
-            archived_ids = set()
-
-    rows = []
-    for c in filtered:
-        if exclude_finished and int(c["challenge_id"]) in archived_ids:
+    addr = settings.MOTIFY_CONTRACT_ADDRESS
+    fetched = indexed = skipped = 0
+    responses: List[Any] = []
+    buf: List[Dict[str, Any]] = []
+
+    def _flush() -> None:
+        nonlocal indexed, skipped
+        # Optionally skip already-archived challenges (present in finished_challenges)
+        archived_ids: frozenset[int] = frozenset()
+        if exclude_finished and buf:
+            try:
+                archived_ids = _archived_ids(dal, [c["challenge_id"] for c in buf])
+            except Exception:
+                archived_ids = frozenset()
+        rows = [
+            {
+                "contract_address": addr,
+                **dict(zip(_FIELDS, _get_fields(c))),
+                "name": c.get("name", ""),
+            }
+            for c in buf
+            # ChainReader already yields int challenge ids; archived_ids is empty unless exclude_finished
+            if c["challenge_id"] not in archived_ids
+        ]
+        responses.append(dal.upsert_chain_challenges(rows))
+        indexed += len(rows)
+        skipped += len(archived_ids)
+        buf.clear()
+
+    for c in reader.iter_challenges(limit=limit):
+        fetched += 1
+        if only_ready_to_end and not (c["end_time"] <= ts and not c["results_finalized"]):
             continue
-        rows.append({
-            "contract_address": settings.MOTIFY_CONTRACT_ADDRESS,
-            "challenge_id": c["challenge_id"],
-            "recipient": c["recipient"],
-            "start_time": c["start_time"],
-            "end_time": c["end_time"],
-            "is_private": c["is_private"],
-            "name": c.get("name", ""),
-            "api_type": c["api_type"],
-            "goal_type": c["goal_type"],
-            "goal_amount": c["goal_amount"],
-            "description": c["description"],
-            "total_donation_amount": c["total_donation_amount"],
-            "results_finalized": c["results_finalized"],
-            "participant_count": c["participant_count"],
-        })
+        buf.append(c)
+        if len(buf) >= _UPSERT_PAGE:
+            _flush()
+    if buf or not responses:
+        _flush()
 
-    resp = dal.upsert_chain_challenges(rows)
     # normalize for logging/debug only
-    supabase_response = getattr(resp, "model_dump", lambda: str(resp))()
+    dumps = [getattr(resp, "model_dump", lambda: str(resp))() for resp in responses]
     return {
-        "fetched": len(items),
-        "indexed": len(rows),
+        "fetched": fetched,
+        "indexed": indexed,
         "only_ready_to_end": only_ready_to_end,
         "exclude_finished": exclude_finished,
-        "skipped_archived": len(archived_ids) if exclude_finished else 0,
-        "supabase_response": supabase_response,
+        "skipped_archived": skipped,
+        "supabase_response": dumps[0] if len(dumps) == 1 else dumps,
     }
 
 
-def cache_participants(challenge_id: int) -> Dict[str, Any]:
+def cache_participants(
+    challenge_id: int,
+    *,
+    archived: Optional[bool] = None,
+    ready_row: Optional[Dict[str, Any]] = None,
+    detail: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Cache on-chain participants of a ready challenge into chain_participants.
+
+    `archived` and `ready_row` may be prefetched by batch callers (see
+    process_ready_once) to skip the per-challenge Supabase status checks, and
+    `detail` (ChainReader.get_challenge_detail shape) to skip the chain read.
+    """
     if challenge_id < 0:
         raise ValueError("challenge_id must be >= 0")
 
@@ -101,42 +159,35 @@ def cache_participants(challenge_id: int) -> Dict[str, Any]:
         raise RuntimeError("Supabase not configured")
 
     # If already archived, skip any further caching
-    archived_chk = (
-        dal.client
-        .table("finished_challenges")
-        .select("challenge_id")
-        .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
-        .eq("challenge_id", int(challenge_id))
-        .limit(1)
-        .execute()
-    )
-    if _get_resp_data(archived_chk):
+    if archived is None:
+        archived = bool(_archived_ids(dal, [int(challenge_id)]))
+    if archived:
         return {"challenge_id": challenge_id, "participants_indexed": 0, "skipped": True, "reason": "already_archived"}
 
     # Enforce ready-state: challenge must be ended and not finalized in cache
     from time import time as now
     ts = int(now())
-    chk = (
-        dal.client
-        .table("chain_challenges")
-        .select("challenge_id,end_time,results_finalized")
-        .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
-        .eq("challenge_id", challenge_id)
-        .lte("end_time", ts)
-        .eq("results_finalized", False)
-        .limit(1)
-        .execute()
-    )
-    ready_rows = _get_resp_data(chk)
-    if not ready_rows:
+    if ready_row is not None:
+        is_ready = int(ready_row["end_time"]) <= ts and not ready_row["results_finalized"]
+    else:
+        chk = (
+            dal.client
+            .table("chain_challenges")
+            .select("challenge_id,end_time,results_finalized")
+            .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
+            .eq("challenge_id", challenge_id)
+            .lte("end_time", ts)
+            .eq("results_finalized", False)
+            .limit(1)
+            .execute()
+        )
+        is_ready = bool(_get_resp_data(chk))
+    if not is_ready:
         return {"challenge_id": challenge_id, "participants_indexed": 0, "skipped": True, "reason": "not_ready"}
 
-    _ensure_web3_configured()
-    reader = ChainReader.from_settings()
-    if not reader:
-        raise RuntimeError("Failed to init ChainReader")
+    if detail is None:
+        detail = _reader().get_challenge_detail(challenge_id)
 
-    detail = reader.get_challenge_detail(challenge_id)
     rows = []
     for p in detail.get("participants", []):
         rows.append({
@@ -153,6 +204,60 @@ def cache_participants(challenge_id: int) -> Dict[str, Any]:
     return {"challenge_id": challenge_id, "participants_indexed": len(rows), "skipped": False}
 
 
+def _archived_ids(dal: SupabaseDAL, ids: List[int]) -> frozenset[int]:
+    """Return the subset of `ids` already present in finished_challenges.
+
+    Ids previously seen as archived in this process are answered from memory; the
+    rest are resolved with one query.
+    """
+    addr = settings.MOTIFY_CONTRACT_ADDRESS
+    archived = {cid for cid in ids if (addr, cid) in _KNOWN_ARCHIVED}
+    unknown = [cid for cid in ids if cid not in archived]
+    if not unknown:
+        return frozenset(archived)
+    resp = (
+        dal.client
+        .table("finished_challenges")
+        .select("challenge_id")
+        .eq("contract_address", addr)
+        .in_("challenge_id", unknown)
+        .execute()
+    )
+    found = set(map(int, (r["challenge_id"] for r in _get_resp_data(resp))))
+    _KNOWN_ARCHIVED.update((addr, cid) for cid in found)
+    return frozenset(archived | found)
+
+
+def _participants_by_challenge(dal: SupabaseDAL, ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Fetch cached participants for several challenges, grouped by challenge_id.
+
+    Pages through the rows in a stable order so PostgREST's max-rows cap cannot truncate
+    a challenge's participant list.
+    """
+    grouped: Dict[int, List[Dict[str, Any]]] = {cid: [] for cid in ids}
+    if not ids:
+        return grouped
+    start = 0
+    while True:
+        resp = (
+            dal.client
+            .table("chain_participants")
+            .select("challenge_id,participant_address,amount")
+            .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
+            .in_("challenge_id", ids)
+            .order("challenge_id")
+            .order("participant_address")
+            .range(start, start + _PARTICIPANT_PAGE - 1)
+            .execute()
+        )
+        rows = _get_resp_data(resp)
+        for row in rows:
+            grouped.setdefault(int(row["challenge_id"]), []).append(row)
+        if len(rows) < _PARTICIPANT_PAGE:
+            return grouped
+        start += _PARTICIPANT_PAGE
+
+
 def list_ready_challenges(limit: int = 200) -> List[Dict[str, Any]]:
     dal = SupabaseDAL.from_env()
     if not dal:
@@ -175,7 +280,19 @@ def list_ready_challenges(limit: int = 200) -> List[Dict[str, Any]]:
     
 
 
-def prepare_run(challenge_id: int, default_percent_ppm: Optional[int] = None) -> Dict[str, Any]:
+def prepare_run(
+    challenge_id: int,
+    default_percent_ppm: Optional[int] = None,
+    *,
+    participants: Optional[List[Dict[str, Any]]] = None,
+    api_type: Optional[str] = None,
+    ratios: Optional[Dict[str, Optional[float]]] = None,
+) -> Dict[str, Any]:
+    """Build the declare items for a challenge from cached participants and progress.
+
+    `participants`, `api_type` and `ratios` (from fetch_progress_batch) may be prefetched
+    by batch callers to skip the per-challenge Supabase reads and provider calls.
+    """
     if challenge_id < 0:
         raise ValueError("challenge_id must be >= 0")
 
@@ -188,16 +305,17 @@ def prepare_run(challenge_id: int, default_percent_ppm: Optional[int] = None) ->
     if not dal:
         raise RuntimeError("Supabase not configured")
 
-    resp = (
-        dal.client
-        .table("chain_participants")
-        .select("participant_address,amount")
-        .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
-        .eq("challenge_id", challenge_id)
-        .limit(2000)
-        .execute()
-    )
-    participants = _get_resp_data(resp)
+    if participants is None:
+        resp = (
+            dal.client
+            .table("chain_participants")
+            .select("participant_address,amount")
+            .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
+            .eq("challenge_id", challenge_id)
+            .limit(2000)
+            .execute()
+        )
+        participants = _get_resp_data(resp)
 
     if not participants:
         # Attempt to cache participants (enforces ready state)
@@ -215,21 +333,22 @@ def prepare_run(challenge_id: int, default_percent_ppm: Optional[int] = None) ->
             participants = _get_resp_data(participants)
 
     # Determine provider from cached challenge (api_type) to select correct token source
-    chal = (
-        dal.client
-        .table("chain_challenges")
-        .select("api_type")
-        .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
-        .eq("challenge_id", challenge_id)
-        .limit(1)
-        .execute()
-    )
-    chal_rows = _get_resp_data(chal)
-    api_type = (chal_rows[0]["api_type"] if chal_rows else None)
+    if api_type is None:
+        chal = (
+            dal.client
+            .table("chain_challenges")
+            .select("api_type")
+            .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
+            .eq("challenge_id", challenge_id)
+            .limit(1)
+            .execute()
+        )
+        chal_rows = _get_resp_data(chal)
+        api_type = (chal_rows[0]["api_type"] if chal_rows else None)
 
     # Look up progress ratios for each participant and compute ppm
-    addr_key = lambda a: str(a).lower()
-    ratios = fetch_progress(challenge_id, participants, api_type=api_type)
+    if ratios is None:
+        ratios = fetch_progress(challenge_id, participants, api_type=api_type)
     items = []
     for row in participants:
         addr = row["participant_address"]
@@ -250,6 +369,34 @@ def prepare_run(challenge_id: int, default_percent_ppm: Optional[int] = None) ->
     }
 
 
+def _cache_ready(dal: SupabaseDAL, ready: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """cache_participants for every ready row, with prefetched archived ids and chain details.
+
+    Returns {challenge_id: cache_participants result}.
+    """
+    ids = [int(row["challenge_id"]) for row in ready]
+    archived = _archived_ids(dal, ids)
+
+    # Read all pending challenges in one Multicall3 eth_call; any miss falls back
+    # to a per-challenge getChallengeById inside cache_participants
+    details: Dict[int, Dict[str, Any]] = {}
+    pending = [cid for cid in ids if cid not in archived]
+    if pending:
+        reader = _reader()
+        try:
+            details = reader.get_challenge_details(pending)
+        except Exception:
+            details = {}
+
+    def _cache(row: Dict[str, Any]) -> Dict[str, Any]:
+        cid = int(row["challenge_id"])
+        return cache_participants(cid, archived=cid in archived, ready_row=row, detail=details.get(cid))
+
+    # Remaining chain reads and upserts are independent and latency-bound; overlap them
+    with ThreadPoolExecutor(max_workers=_CACHE_WORKERS) as ex:
+        return dict(zip(ids, ex.map(_cache, ready)))
+
+
 def cache_details_for_ready(limit: int = 200) -> Dict[str, Any]:
     dal = SupabaseDAL.from_env()
     if not dal:
@@ -257,12 +404,8 @@ def cache_details_for_ready(limit: int = 200) -> Dict[str, Any]:
 
     _ensure_web3_configured()
     ready = list_ready_challenges(limit=limit)
-
-    total = 0
-    for row in ready:
-        cid = int(row["challenge_id"])
-        res = cache_participants(cid)
-        total += int(res.get("participants_indexed", 0))
+    results = _cache_ready(dal, ready)
+    total = sum(int(res.get("participants_indexed", 0)) for res in results.values())
 
     return {"ready": len(ready), "participants_indexed": total}
 
@@ -276,19 +419,40 @@ def process_ready_once(default_percent_ppm: int = 0, limit: int = 50) -> Dict[st
             3) For each, ensure participants are cached
             4) Build a simple constant-ppm preview (stand-in for proofs/policy)
             5) [Placeholder] Here you'd submit declareResults and afterwards mark as finished
+
+        Archived status, chain details and cached participants are fetched once for
+        all ready challenges instead of per challenge.
         """
+        dal = SupabaseDAL.from_env()
+        if not dal:
+                raise RuntimeError("Supabase not configured")
+
         # 1) Refresh cache
         refresh = fetch_and_cache_ended_challenges(limit=limit, only_ready_to_end=True)
-        # 2) List ready
+        # 2) List ready (rows carry api_type, end_time and results_finalized)
         ready = list_ready_challenges(limit=limit)
+        ids = [int(row["challenge_id"]) for row in ready]
+        # 3) Cache participants (enforces ready-state; Multicall prefetch + pooled writes)
+        cached = _cache_ready(dal, ready)
+        participants = _participants_by_challenge(dal, ids)
+        # Progress for all ready challenges at once (GitHub windows batched per user token)
+        ratios = fetch_progress_batch([
+                (int(row["challenge_id"]), participants[int(row["challenge_id"])], row.get("api_type"))
+                for row in ready
+                if participants.get(int(row["challenge_id"]))
+        ])
         processed = []
         for row in ready:
                 cid = int(row["challenge_id"])
-                # 3) Cache participants (enforces ready-state)
-                cached = cache_participants(cid)
                 # 4) Build preview
-                preview = prepare_run(cid, default_percent_ppm=default_percent_ppm)
-                processed.append({"challenge_id": cid, "cached": cached, "preview": preview})
+                preview = prepare_run(
+                        cid,
+                        default_percent_ppm=default_percent_ppm,
+                        participants=participants.get(cid) or None,
+                        api_type=row.get("api_type"),
+                        ratios=ratios.get(cid),
+                )
+                processed.append({"challenge_id": cid, "cached": cached[cid], "preview": preview})
 
         return {"refresh": refresh, "count": len(processed), "items": processed}
 
@@ -325,6 +489,7 @@ def archive_and_cleanup(
         "summary": summary or {},
     }
     arch_resp = dal.upsert_finished_challenges([archive_item])
+    _KNOWN_ARCHIVED.add((settings.MOTIFY_CONTRACT_ADDRESS, int(challenge_id)))
 
     # 1b) Archive (participant-level) if provided
     parts_resp = None
@@ -1,14 +1,143 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import requests
-from datetime import datetime, timezone, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import date, datetime, timezone
 
 from app.core.config import settings
 from app.models.db import SupabaseDAL
 
 import base64
 
+# Per-user provider calls are network-bound; run them concurrently over a shared, pooled session.
+_PROGRESS_WORKERS = 32
+# Shared by all callers so concurrent requests stay within one global bound. Tasks must not submit
+# to the pool themselves (no nested _fan_out inside fn), or they could deadlock waiting on it.
+_IO_POOL = ThreadPoolExecutor(max_workers=_PROGRESS_WORKERS, thread_name_prefix="progress")
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    # GraphQL reads are idempotent, so POST is safe to retry on server errors (429s are handled per provider)
+    max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504], allowed_methods=frozenset({"GET", "POST"})),
+))
+
+# Goal-type keywords (case-insensitive): coding-time goals need both words, per-day goals any one
+_CODING_TIME_GOAL = re.compile(r"^(?=.*coding)(?=.*(?:time|hour))", re.IGNORECASE | re.DOTALL)
+_GITHUB_DAILY_GOAL = re.compile(r"push|commit|contribution|per_day", re.IGNORECASE)
+_FARCASTER_DAILY_GOAL = re.compile(r"post|cast|per_day", re.IGNORECASE)
+_PROVIDERS = frozenset({"github", "farcaster", "wakatime"})
+
+_GH_URL = "https://api.github.com/graphql"
+_GH_CALENDAR = "contributionCalendar { weeks { contributionDays { date contributionCount } } }"
+_GH_QUERY = (
+    "query($from: DateTime!, $to: DateTime!) {"
+    "  viewer {"
+    f"    contributionsCollection(from: $from, to: $to) {{ {_GH_CALENDAR} }}"
+    "  }"
+    "}"
+)
+_GH_HEADERS = {
+    "Accept": "application/vnd.github+json",
+    "User-Agent": "motify-backend",
+}
+
+
+@lru_cache(maxsize=1)
+def _dal() -> Optional[SupabaseDAL]:
+    """Process-wide Supabase DAL (settings are read once at startup); use _dal.cache_clear() in tests."""
+    return SupabaseDAL.from_env()
+
+
+def _rows(resp: Any) -> List[Dict[str, Any]]:
+    """Rows from a supabase-py response (always exposes .data); empty list when missing."""
+    return getattr(resp, "data", None) or []
+
+
+def addr_key(a: Any) -> str:
+    """Normalize a wallet address to the lowercase form used as dict/cache key."""
+    return a.lower() if isinstance(a, str) else str(a).lower()
+
+
+def _fan_out(fn: Callable[[Any, Any], Tuple[Any, Any]], pairs: List[Tuple[Any, Any]]) -> Dict[Any, Any]:
+    """Run fn(key, value) for each pair on a bounded thread pool; returns {key: result} (e.g. {addr: ratio})."""
+    if not pairs:
+        return {}
+    if len(pairs) == 1:
+        return dict([fn(*pairs[0])])
+    return dict(_IO_POOL.map(lambda pair: fn(*pair), pairs))
+
+
+def _secret_key(secret: str) -> str:
+    """Short digest used in cache keys so raw tokens are not kept as dict keys."""
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def _cached_ratio(key: Tuple[Any, ...]) -> Optional[float]:
+    with _CACHE_LOCK:
+        hit = _RESULT_CACHE.get(key)
+    return hit[1] if hit and hit[0] > time.monotonic() else None
+
+
+def _store_ratio(key: Tuple[Any, ...], end_date, ratio: float) -> None:
+    closed = end_date is not None and end_date < datetime.now(tz=timezone.utc).date()
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        if len(_RESULT_CACHE) >= _RESULT_CACHE_MAX:
+            for k in [k for k, (exp, _) in _RESULT_CACHE.items() if exp <= now]:
+                del _RESULT_CACHE[k]
+            if len(_RESULT_CACHE) >= _RESULT_CACHE_MAX:
+                _RESULT_CACHE.clear()
+        _RESULT_CACHE[key] = (now + (_RESULT_TTL_CLOSED_SEC if closed else _RESULT_TTL_OPEN_SEC), ratio)
+
+
+# Short-lived in-process caches for Supabase lookups repeated within a run.
+_META_TTL_SEC = 60
+_TOKEN_TTL_SEC = 300
+_CACHE_LOCK = threading.Lock()
+_META_CACHE: Dict[Tuple[str, int], Tuple[float, Tuple[Optional[Tuple[int, int]], Optional[str], int]]] = {}
+_TOKEN_CACHE: Dict[Tuple[str, str], Tuple[float, Optional[str]]] = {}
+_TOKEN_QUERY_CHUNK = 500
+_DEFAULT_TOKEN_LAYOUT = ("user_tokens", "wallet_address", "provider", "access_token")
+# Optional SQL functions/tables from docs/schema.sql that turned out not to be deployed; not retried in this process
+_UNAVAILABLE_DB_OBJECTS: set[str] = set()
+# PostgREST / Postgres codes meaning the object is not deployed; other failures (timeouts, 5xx) are transient
+_MISSING_FUNCTION_CODES = ("PGRST202", "42883")
+_MISSING_TABLE_CODES = ("PGRST205", "42P01")
+
+# Provider ratio cache: windows still open are re-fetched after a few minutes, closed ones rarely change
+_RESULT_TTL_OPEN_SEC = 300
+_RESULT_TTL_CLOSED_SEC = 86400
+_RESULT_CACHE_MAX = 8192
+_RESULT_CACHE: Dict[Tuple[Any, ...], Tuple[float, float]] = {}
+# Wallet -> (expiry, Farcaster FID). A wallet's verification can move to another FID, so mappings
+# (in memory and in farcaster_address_fid) are re-resolved once they are older than _FID_TTL_SEC.
+_FID_TTL_SEC = 86400
+_FID_CACHE: Dict[str, Tuple[float, int]] = {}
+
+# In-flight fetch_progress calls keyed by (challenge_id, provider, addresses)
+_INFLIGHT_LOCK = threading.Lock()
+_INFLIGHT: Dict[Tuple[int, str, Tuple[str, ...]], Future] = {}
+_INFLIGHT_WAIT_SEC = 300
+
+# Neynar rate limiting: short Retry-After waits are honoured once per fetch; longer ones pause all cast fetches.
+_MAX_RETRY_AFTER_SEC = 30
+_NEYNAR_BULK_ADDRESSES = 350
+_FID_TABLE = "farcaster_address_fid"
+_FID_QUERY_CHUNK = 500
+_NEYNAR_THROTTLE_UNTIL = 0.0
+_TOKEN_QUERY_WORKERS = 4
+# Module-level like _IO_POOL, but separate: _lookup_tokens may itself run inside an _IO_POOL task
+_TOKEN_QUERY_POOL = ThreadPoolExecutor(max_workers=_TOKEN_QUERY_WORKERS, thread_name_prefix="tokens")
+
 def _progress_wakatime(
     tokens: Dict[str, Optional[str]],  # address -> API key string
     participants: List[Dict[str, Any]],
@@ -29,49 +158,50 @@ def _progress_wakatime(
 
     Falls back to Stats range endpoint only when window is missing.
     """
-    addr_key = lambda a: str(a).lower()
     api_base_url = settings.WAKATIME_API_BASE_URL.rstrip('/')
 
     # Normalize goal type check
-    gt = (goal_type or "").lower()
-    is_coding_time_goal = ("coding" in gt) and ("time" in gt or "hour" in gt or "hours" in gt)
+    is_coding_time_goal = bool(_CODING_TIME_GOAL.search(goal_type or ""))
     required_hours = max(1, int(goal_amount or 1)) if is_coding_time_goal else 1
 
-    out: Dict[str, Optional[float]] = {}
-    for p in participants:
-        addr = addr_key(p["participant_address"])
-        api_key = tokens.get(addr)
-        if not api_key:
-            out[addr] = None
-            continue
-
+    # Resolve the request shape once; only the api_key varies per participant
+    has_window = bool(window and window[0] and window[1] and window[1] >= window[0])
+    cache_end = _utc_date(window[1]) if has_window else None
+    if has_window:
+        url = f"{api_base_url}/users/current/summaries"
+        params = {
+            "start": _utc_date(window[0]).isoformat(),
+            "end": cache_end.isoformat(),
+            "timezone": "UTC",
+        }
+    else:
+        # No window: fallback to Stats with a reasonable default range
+        url = f"{api_base_url}/users/current/stats/last_7_days"
+        params = {}
+
+    def _one(addr: str, api_key: str) -> Tuple[str, Optional[float]]:
+        cache_key = ("wakatime", _secret_key(api_key), tuple(window) if has_window else None, required_hours)
+        cached = _cached_ratio(cache_key)
+        if cached is not None:
+            return addr, cached
         try:
-            # Prepare Authorization header: HTTP Basic with api_key as username and blank password
-            encoded_key = base64.b64encode(f"{api_key}:".encode()).decode()
             headers = {
-                "Authorization": f"Basic {encoded_key}",
+                "Authorization": _waka_basic_auth(api_key),
                 "Accept": "application/json",
             }
 
             total_seconds: float = 0.0
 
-            if window and window[0] and window[1] and window[1] >= window[0]:
+            if has_window:
                 # Exact window: query Summaries
-                start_date = datetime.fromtimestamp(window[0], tz=timezone.utc).date()
-                end_date = datetime.fromtimestamp(window[1], tz=timezone.utc).date()
-                url = f"{api_base_url}/users/current/summaries"
-                params = {
-                    "start": start_date.isoformat(),
-                    "end": end_date.isoformat(),
-                    "timezone": "UTC",
-                }
-                response = requests.get(url, headers=headers, params=params, timeout=25)
+                response = _SESSION.get(url, headers=headers, params=params, timeout=25)
                 if response.status_code in (401, 403):
                     # Retry once using query param auth
                     params_q = dict(params)
                     params_q["api_key"] = api_key
-                    response = requests.get(url, params=params_q, headers={"Accept": "application/json"}, timeout=25)
-                response.raise_for_status()
+                    response = _SESSION.get(url, params=params_q, headers={"Accept": "application/json"}, timeout=25)
+                if response.status_code >= 400:
+                    return addr, None
                 data = response.json() or {}
                 # Prefer cumulative_total.seconds if available; else sum per-day grand_total.total_seconds
                 cum = (data.get("cumulative_total") or {}).get("seconds")
@@ -88,118 +218,316 @@ def _progress_wakatime(
                         except Exception:
                             pass
             else:
-                # No window: fallback to Stats with a reasonable default range
-                range_str = "last_7_days"
-                url = f"{api_base_url}/users/current/stats/{range_str}"
-                response = requests.get(url, headers=headers, timeout=25)
+                response = _SESSION.get(url, headers=headers, timeout=25)
                 if response.status_code in (401, 403):
-                    response = requests.get(f"{url}?api_key={api_key}", headers={"Accept": "application/json"}, timeout=25)
-                response.raise_for_status()
+                    response = _SESSION.get(f"{url}?api_key={api_key}", headers={"Accept": "application/json"}, timeout=25)
+                if response.status_code >= 400:
+                    return addr, None
                 data = response.json() or {}
                 total_seconds = float(((data.get("data") or {}).get("total_seconds_including_other_language")) or 0.0)
 
             total_hours = total_seconds / 3600.0
-            ratio = min(1.0, max(0.0, total_hours / float(required_hours)))
-            out[addr] = round(ratio, 6)
-
-        except requests.exceptions.HTTPError:
-            out[addr] = None
+            ratio = round(min(1.0, max(0.0, total_hours / float(required_hours))), 6)
+            _store_ratio(cache_key, cache_end, ratio)
+            return addr, ratio
         except requests.exceptions.RequestException:
-            out[addr] = None
+            return addr, None
         except Exception:
-            out[addr] = None
+            # Malformed payloads
+            return addr, None
 
+    # Participants sharing an api_key (team accounts, repeated entries) cost one request
+    out: Dict[str, Optional[float]] = {}
+    by_key: Dict[str, List[str]] = {}
+    for p in participants:
+        addr = addr_key(p["participant_address"])
+        api_key = tokens.get(addr)
+        out[addr] = None
+        if api_key:
+            by_key.setdefault(api_key, []).append(addr)
+    for addr, ratio in _fan_out(_one, [(addrs[0], key) for key, addrs in by_key.items()]).items():
+        for a in by_key[tokens[addr]]:
+            out[a] = ratio
     return out
 
-def _lookup_tokens(api_type: Optional[str], participants: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+@lru_cache(maxsize=4096)
+def _waka_basic_auth(api_key: str) -> str:
+    """HTTP Basic Authorization value with the WakaTime api_key as username and blank password."""
+    return "Basic " + base64.b64encode(f"{api_key}:".encode()).decode()
+
+
+def _lookup_tokens(api_type: Optional[str], addrs: List[str]) -> Dict[str, Optional[str]]:
     """Optionally fetch per-user access tokens from Supabase for a given provider.
 
-    Returns dict[address_lower] = token or None.
+    addrs are lowercased wallet addresses. Returns dict[address_lower] = token or None.
     Controlled by settings.USER_TOKENS_*; if not set, returns None for all.
     """
-    addr_key = lambda a: str(a).lower()
     # If no provider specified; return None tokens
     if not api_type:
         # No provider specified; return None tokens
-        return {addr_key(p["participant_address"]): None for p in participants}
+        return dict.fromkeys(addrs)
 
     # Provider specified but token lookup not configured: return None tokens to trigger fallback
     if not (settings.USER_TOKENS_TABLE and settings.USER_TOKENS_WALLET_COL and settings.USER_TOKENS_PROVIDER_COL and settings.USER_TOKENS_ACCESS_TOKEN_COL):
-        return {addr_key(p["participant_address"]): None for p in participants}
+        return dict.fromkeys(addrs)
 
-    dal = SupabaseDAL.from_env()
+    dal = _dal()
     if not dal:
         raise RuntimeError("Supabase not configured for token lookup")
 
-    addrs = [addr_key(p["participant_address"]) for p in participants]
-    # Simple in-clause query; for large sets, batch or use rpc.
-    resp = (
-        dal.client
-        .table(settings.USER_TOKENS_TABLE)
-        .select(f"{settings.USER_TOKENS_WALLET_COL},{settings.USER_TOKENS_ACCESS_TOKEN_COL}")
-        .eq(settings.USER_TOKENS_PROVIDER_COL, api_type)
-        .in_(settings.USER_TOKENS_WALLET_COL, addrs)
-        .limit(5000)
-        .execute()
-    )
-    data = resp.data if hasattr(resp, "data") else (resp.model_dump().get("data") if hasattr(resp, "model_dump") else [])
-    tokens = {str(row.get(settings.USER_TOKENS_WALLET_COL, "")).lower(): row.get(settings.USER_TOKENS_ACCESS_TOKEN_COL) for row in (data or [])}
+    now = time.monotonic()
+    tokens: Dict[str, Optional[str]] = {}
+    with _CACHE_LOCK:
+        for a in addrs:
+            hit = _TOKEN_CACHE.get((api_type, a))
+            if hit and hit[0] > now:
+                tokens[a] = hit[1]
+    missing = [a for a in dict.fromkeys(addrs) if a not in tokens]
+    if missing:
+        # Query cache misses only. Prefer get_user_tokens (addresses travel in the JSON body); otherwise
+        # use bounded in_() chunks so request URLs stay small, running the chunks concurrently.
+        def _query(chunk: List[str]) -> List[Dict[str, Any]]:
+            resp = (
+                dal.client
+                .table(settings.USER_TOKENS_TABLE)
+                .select(f"{settings.USER_TOKENS_WALLET_COL},{settings.USER_TOKENS_ACCESS_TOKEN_COL}")
+                .eq(settings.USER_TOKENS_PROVIDER_COL, api_type)
+                .in_(settings.USER_TOKENS_WALLET_COL, chunk)
+                .limit(len(chunk))
+                .execute()
+            )
+            return _rows(resp)
+
+        rpc_rows = _tokens_via_rpc(dal, api_type, missing)
+        if rpc_rows is not None:
+            results = [rpc_rows]
+        else:
+            chunks = [missing[i:i + _TOKEN_QUERY_CHUNK] for i in range(0, len(missing), _TOKEN_QUERY_CHUNK)]
+            if len(chunks) == 1:
+                results = [_query(chunks[0])]
+            else:
+                results = list(_TOKEN_QUERY_POOL.map(_query, chunks))
+        fetched = {
+            str(row.get(settings.USER_TOKENS_WALLET_COL, "")).lower(): row.get(settings.USER_TOKENS_ACCESS_TOKEN_COL)
+            for rows in results
+            for row in rows
+        }
+        expires = now + _TOKEN_TTL_SEC
+        with _CACHE_LOCK:
+            for a in missing:
+                # Cache misses too, so users without a connected account are not re-queried every call
+                tokens[a] = fetched.get(a)
+                _TOKEN_CACHE[(api_type, a)] = (expires, tokens[a])
     # Fill missing with None
     return {a: tokens.get(a) for a in addrs}
 
 
-def fetch_progress(challenge_id: int, participants: List[Dict[str, Any]], api_type: Optional[str] = None) -> Dict[str, Optional[float]]:
-    """Stub: return a per-user completion ratio in [0.0, 1.0].
+def _note_if_missing(name: str, exc: Exception, codes: Tuple[str, ...]) -> None:
+    """Stop using `name` for this process, but only when the error says it does not exist."""
+    code = str(getattr(exc, "code", "") or "")
+    if code in codes or any(c in str(exc) for c in codes):
+        _UNAVAILABLE_DB_OBJECTS.add(name)
 
-    Keys are participant addresses (lowercased), values are floats.
-    Replace this with real API calls to compute completion for each participant.
-    """
-    addr_key = lambda a: str(a).lower()
-    tokens = _lookup_tokens(api_type, participants)  # tokens available when you integrate real provider calls
 
-    # Do not early-return on missing tokens: provider-specific logic may still resolve identities (e.g., Farcaster via wallet)
+def _token_rpc_usable(name: str) -> bool:
+    """Token RPCs read public.user_tokens directly, so only use them with the default column layout."""
+    layout = (settings.USER_TOKENS_TABLE, settings.USER_TOKENS_WALLET_COL, settings.USER_TOKENS_PROVIDER_COL, settings.USER_TOKENS_ACCESS_TOKEN_COL)
+    return layout == _DEFAULT_TOKEN_LAYOUT and name not in _UNAVAILABLE_DB_OBJECTS
+
+
+def _tokens_via_rpc(dal: SupabaseDAL, api_type: str, addrs: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """Rows {wallet_address, access_token} from the get_user_tokens function, or None to fall back to in_()."""
+    if not _token_rpc_usable("get_user_tokens"):
+        return None
+    try:
+        resp = dal.client.rpc("get_user_tokens", {"p_provider": api_type, "p_addrs": addrs}).execute()
+    except Exception as e:
+        _note_if_missing("get_user_tokens", e, _MISSING_FUNCTION_CODES)
+        return None
+    return _rows(resp)
+
+
+def _get_challenge_meta(challenge_id: int) -> Tuple[Optional[Tuple[int, int]], Optional[str], int]:
+    """Return (window, goal_type, goal_amount) for a challenge from chain_challenges.
+
+    window is (start_time, end_time) in unix seconds, or None when unknown. Successful lookups
+    are cached briefly since the same challenge is queried repeatedly during a run.
+    """
+    key = (str(settings.MOTIFY_CONTRACT_ADDRESS or "").lower(), int(challenge_id))
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        hit = _META_CACHE.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
 
-    # Fetch challenge window and goal from DB (start/end are unix seconds)
-    dal = SupabaseDAL.from_env()
     window: Tuple[int, int] | None = None
     goal_type: Optional[str] = None
     goal_amount: int = 1
-    if dal:
-        try:
-            resp = (
-                dal.client
-                .table("chain_challenges")
-                .select("start_time,end_time,goal_type,goal_amount")
-                .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
-                .eq("challenge_id", int(challenge_id))
-                .limit(1)
-                .execute()
-            )
-            data = resp.data if hasattr(resp, "data") else (resp.model_dump().get("data") if hasattr(resp, "model_dump") else [])
-            if data:
-                row = data[0]
-                st = int(row.get("start_time") or 0)
-                et = int(row.get("end_time") or 0)
-                if et and st and et >= st:
-                    window = (st, et)
-                goal_type = row.get("goal_type")
-                try:
-                    goal_amount = int(row.get("goal_amount") or 1)
-                except Exception:
-                    goal_amount = 1
-        except Exception:
-            window = None
+    dal = _dal()
+    if not dal:
+        return window, goal_type, goal_amount
+    try:
+        resp = (
+            dal.client
+            .table("chain_challenges")
+            .select("start_time,end_time,goal_type,goal_amount")
+            .eq("contract_address", settings.MOTIFY_CONTRACT_ADDRESS)
+            .eq("challenge_id", int(challenge_id))
+            .limit(1)
+            .execute()
+        )
+        data = _rows(resp)
+        if data:
+            window, goal_type, goal_amount = _parse_meta(data[0])
+    except Exception:
+        # Not cached: retry the lookup on the next call
+        return None, goal_type, goal_amount
+    meta = (window, goal_type, goal_amount)
+    with _CACHE_LOCK:
+        _META_CACHE[key] = (now + _META_TTL_SEC, meta)
+    return meta
+
+
+def _parse_meta(row: Dict[str, Any]) -> Tuple[Optional[Tuple[int, int]], Optional[str], int]:
+    st = int(row.get("start_time") or 0)
+    et = int(row.get("end_time") or 0)
+    window = (st, et) if et and st and et >= st else None
+    try:
+        goal_amount = int(row.get("goal_amount") or 1)
+    except Exception:
+        goal_amount = 1
+    return window, row.get("goal_type"), goal_amount
+
+
+def _prime_challenge_context(challenge_id: int, api_type: Optional[str], addrs: List[str]) -> None:
+    """Fill the meta and token caches with one motify_challenge_context RPC (see docs/schema.sql).
+
+    Only used with the default user_tokens layout the SQL function reads. Any failure leaves the
+    caches untouched so _get_challenge_meta/_lookup_tokens fall back to their own queries.
+    """
+    if not (api_type and addrs and _token_rpc_usable("motify_challenge_context")):
+        return
+    meta_key = (str(settings.MOTIFY_CONTRACT_ADDRESS or "").lower(), int(challenge_id))
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        hit = _META_CACHE.get(meta_key)
+    if hit and hit[0] > now:
+        return
+    dal = _dal()
+    if not dal:
+        return
+    try:
+        resp = dal.client.rpc("motify_challenge_context", {
+            "p_challenge_id": int(challenge_id),
+            "p_contract": settings.MOTIFY_CONTRACT_ADDRESS,
+            "p_provider": api_type,
+            "p_addrs": list(dict.fromkeys(addrs)),
+        }).execute()
+        data = getattr(resp, "data", None)
+        if not isinstance(data, dict):
+            return
+        meta = _parse_meta(data["meta"]) if data.get("meta") else (None, None, 1)
+        fetched = {str(row.get("wallet_address", "")).lower(): row.get("access_token") for row in (data.get("tokens") or [])}
+    except Exception as e:
+        # Fall back to the per-table queries; only a missing function disables the RPC for this process
+        _note_if_missing("motify_challenge_context", e, _MISSING_FUNCTION_CODES)
+        return
+    with _CACHE_LOCK:
+        _META_CACHE[meta_key] = (now + _META_TTL_SEC, meta)
+        for a in addrs:
+            _TOKEN_CACHE[(api_type, a)] = (now + _TOKEN_TTL_SEC, fetched.get(a))
+
+
+def fetch_progress(challenge_id: int, participants: List[Dict[str, Any]], api_type: Optional[str] = None) -> Dict[str, Optional[float]]:
+    """Stub: return a per-user completion ratio in [0.0, 1.0].
+
+    Keys are participant addresses (lowercased), values are floats.
+    Replace this with real API calls to compute completion for each participant.
+    """
+    addrs = [addr_key(p["participant_address"]) for p in participants]
+    # Singleflight: concurrent identical calls share one computation instead of re-hitting Supabase/providers
+    key = (int(challenge_id), (api_type or "").lower(), tuple(sorted(set(addrs))))
+    with _INFLIGHT_LOCK:
+        fut = _INFLIGHT.get(key)
+        leader = fut is None
+        if leader:
+            fut = _INFLIGHT[key] = Future()
+    if not leader:
+        return dict(fut.result(timeout=_INFLIGHT_WAIT_SEC))
+    try:
+        out = _fetch_progress(challenge_id, participants, addrs, api_type)
+        fut.set_result(out)
+        return out
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+
+
+def _fetch_progress(challenge_id: int, participants: List[Dict[str, Any]], addrs: List[str], api_type: Optional[str]) -> Dict[str, Optional[float]]:
+    provider = (api_type or "").lower()
+    # Unknown providers never produce data, so don't spend the context/token/meta queries on them
+    if provider not in _PROVIDERS:
+        return dict.fromkeys(addrs)
+
+    # One round-trip for meta + tokens when the RPC is available; the helpers below then hit their caches
+    _prime_challenge_context(challenge_id, api_type, addrs)
+    tokens = _lookup_tokens(api_type, addrs)  # tokens available when you integrate real provider calls
+
+    # GitHub/WakaTime cannot fetch anything without a token, so skip the meta query when nobody has one.
+    # Farcaster is not short-circuited: it may still resolve identities via the wallet.
+    if provider in ("github", "wakatime") and not any(tokens.values()):
+        return dict.fromkeys(addrs)
+
+    window, goal_type, goal_amount = _get_challenge_meta(challenge_id)
 
     # Provider-specific logic
-    if (api_type or "").lower() == "github":
+    if provider == "github":
         return _progress_github(tokens, participants, window=window, goal_type=goal_type, goal_amount=goal_amount)
-    if (api_type or "").lower() == "farcaster":
+    if provider == "farcaster":
         return _progress_farcaster(tokens, participants, window=window, goal_type=goal_type, goal_amount=goal_amount)
-    if (api_type or "").lower() == "wakatime":
-        return _progress_wakatime(tokens, participants, window=window, goal_type=goal_type, goal_amount=goal_amount)
+    return _progress_wakatime(tokens, participants, window=window, goal_type=goal_type, goal_amount=goal_amount)
+
+
+def fetch_progress_batch(challenges: List[Tuple[int, List[Dict[str, Any]], Optional[str]]]) -> Dict[int, Dict[str, Optional[float]]]:
+    """fetch_progress for several (challenge_id, participants, api_type) at once.
+
+    GitHub challenges are grouped per token so a user in several challenges costs one
+    GraphQL POST (one aliased window per challenge); other providers go through fetch_progress.
+    """
+    out: Dict[int, Dict[str, Optional[float]]] = {}
+    # token -> {(start, end, required): [(challenge_id, addr), ...]}
+    by_token: Dict[str, Dict[Tuple[Any, Any, int], List[Tuple[int, str]]]] = {}
+    for challenge_id, participants, api_type in challenges:
+        if (api_type or "").lower() != "github":
+            out[challenge_id] = fetch_progress(challenge_id, participants, api_type=api_type)
+            continue
+        addrs = [addr_key(p["participant_address"]) for p in participants]
+        _prime_challenge_context(challenge_id, api_type, addrs)
+        tokens = _lookup_tokens(api_type, addrs)
+        out[challenge_id] = dict.fromkeys(addrs)
+        if not any(tokens.values()):
+            continue
+        params = _github_params(*_get_challenge_meta(challenge_id))
+        for a in addrs:
+            if tokens.get(a):
+                by_token.setdefault(tokens[a], {}).setdefault(params, []).append((challenge_id, a))
+
+    def _one(token: str, jobs: Dict[Tuple[Any, Any, int], List[Tuple[int, str]]]):
+        windows = list(jobs)
+        try:
+            ratios: List[Optional[float]] = list(_github_ratios_for_user(token, windows))
+        except Exception:
+            # On failure (rate limit, network, etc.), return None to trigger fallback
+            ratios = [None] * len(windows)
+        return token, [(target, r) for w, r in zip(windows, ratios) for target in jobs[w]]
 
-    # Default for unknown providers: no data
-    return {addr_key(p["participant_address"]): None for p in participants}
+    for results in _fan_out(_one, list(by_token.items())).values():
+        for (challenge_id, addr), ratio in results:
+            out[challenge_id][addr] = ratio
+    return out
 
 
 def _progress_github(
@@ -218,95 +546,139 @@ def _progress_github(
 
     Note: With scope 'user:email' only public contributions are visible. For private repo commits, add 'repo' scope.
     """
-    addr_key = lambda a: str(a).lower()
-
-    # Determine window in UTC days
-    if window and window[0] and window[1] and window[1] >= window[0]:
-        start_dt = datetime.fromtimestamp(window[0], tz=timezone.utc).date()
-        end_dt = datetime.fromtimestamp(window[1], tz=timezone.utc).date()
-    else:
-        # Default to today's UTC day
-        today = datetime.now(tz=timezone.utc).date()
-        start_dt = end_dt = today
 
-    total_days = (end_dt - start_dt).days + 1
-    total_days = max(1, total_days)
+    start_dt, end_dt, required_per_day = _github_params(window, goal_type, goal_amount)
 
-    # Normalize goal (treat push/commit/contribution keywords equivalently)
-    gt = (goal_type or "contribution_per_day").lower()
-    required_per_day = max(1, int(goal_amount or 1)) if ("push" in gt or "commit" in gt or "contribution" in gt or "per_day" in gt) else 1
+    def _one(addr: str, token: str) -> Tuple[str, Optional[float]]:
+        try:
+            return addr, _github_ratio_for_user(token, start_dt, end_dt, required_per_day)
+        except Exception:
+            # On failure (rate limit, network, etc.), return None to trigger fallback
+            return addr, None
 
     out: Dict[str, Optional[float]] = {}
+    pending: List[Tuple[str, str]] = []
     for p in participants:
         addr = addr_key(p["participant_address"])
         token = tokens.get(addr)
-        if not token:
-            out[addr] = None
-            continue
-        try:
-            ratio = _github_ratio_for_user(token, start_dt, end_dt, required_per_day)
-            out[addr] = ratio
-        except Exception:
-            # On failure (rate limit, network, etc.), return None to trigger fallback
-            out[addr] = None
+        out[addr] = None
+        if token:
+            pending.append((addr, token))
+    out.update(_fan_out(_one, pending))
     return out
 
 
-def _github_ratio_for_user(token: str, start_date, end_date, required_per_day: int) -> float:
+def _window_days(window: Optional[Tuple[int, int]]) -> Tuple[date, date]:
+    """(start, end) UTC dates of a challenge window; today's UTC day when the window is missing."""
+    if window and window[0] and window[1] and window[1] >= window[0]:
+        return _utc_date(window[0]), _utc_date(window[1])
+    today = datetime.now(tz=timezone.utc).date()
+    return today, today
+
+
+@lru_cache(maxsize=1024)
+def _utc_date(ts: int) -> date:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).date()
+
+
+def _github_params(window: Optional[Tuple[int, int]], goal_type: Optional[str], goal_amount: int):
+    """Return (start_date, end_date, required_per_day) for a GitHub challenge."""
+    start_dt, end_dt = _window_days(window)
+
+    # Normalize goal (treat push/commit/contribution keywords equivalently)
+    required_per_day = max(1, int(goal_amount or 1)) if _GITHUB_DAILY_GOAL.search(goal_type or "contribution_per_day") else 1
+    return start_dt, end_dt, required_per_day
+
+
+def _github_ratio_for_user(token: str, start_date, end_date, required_per_day: int) -> Optional[float]:
     """Return ratio in [0.0,1.0] of days meeting the required number of contributions.
 
     Approach: use GitHub GraphQL contributionsCollection.calendar to fetch per-day contribution counts
     between start_date and end_date (UTC). Counts include public contributions; private counts may
     also appear for the authenticated user depending on token scope and GitHub settings.
     """
+    return _github_ratios_for_user(token, [(start_date, end_date, required_per_day)])[0]
+
+
+@lru_cache(maxsize=32)
+def _gh_multi_query(n: int) -> str:
+    """GraphQL query with n aliased contributionsCollection windows (w0..wN-1) on the viewer."""
+    decl = ", ".join(f"$from{i}: DateTime!, $to{i}: DateTime!" for i in range(n))
+    body = " ".join(f"w{i}: contributionsCollection(from: $from{i}, to: $to{i}) {{ {_GH_CALENDAR} }}" for i in range(n))
+    return f"query({decl}) {{ viewer {{ {body} }} }}"
+
+
+def _github_ratios_for_user(token: str, windows: List[Tuple[Any, Any, int]]) -> List[Optional[float]]:
+    """Ratios for several (start_date, end_date, required_per_day) windows of one user.
+
+    Cached windows are answered from memory; the rest are fetched together in a single POST.
+    """
+    keys = [("github", _secret_key(token), *w) for w in windows]
+    ratios = [_cached_ratio(k) for k in keys]
+    todo = [i for i, r in enumerate(ratios) if r is None]
+    if todo:
+        fetched = _github_fetch_ratios(token, [windows[i] for i in todo])
+        for i, ratio in zip(todo, fetched):
+            ratios[i] = ratio
+            if ratio is not None:
+                _store_ratio(keys[i], windows[i][1], ratio)
+    return ratios
+
+
+def _github_fetch_ratios(token: str, windows: List[Tuple[Any, Any, int]]) -> List[Optional[float]]:
+    """Fetch ratios for the given windows in a single GraphQL POST (aliased when more than one).
+
+    A window whose alias GitHub rejected (e.g. a span over a year) comes back as None.
+    """
     # Build ISO window boundaries (inclusive)
-    from_iso = f"{start_date.isoformat()}T00:00:00Z"
-    to_iso = f"{end_date.isoformat()}T23:59:59Z"
-
-    q = (
-        "query($from: DateTime!, $to: DateTime!) {"
-        "  viewer {"
-        "    contributionsCollection(from: $from, to: $to) {"
-        "      contributionCalendar {"
-        "        weeks {"
-        "          contributionDays { date contributionCount }"
-        "        }"
-        "      }"
-        "    }"
-        "  }"
-        "}"
-    )
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json",
-        "User-Agent": "motify-backend"
-    }
-    resp = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": q, "variables": {"from": from_iso, "to": to_iso}},
-        headers=headers,
+    bounds = [(f"{s.isoformat()}T00:00:00Z", f"{e.isoformat()}T23:59:59Z") for s, e, _ in windows]
+    if len(windows) == 1:
+        query, variables = _GH_QUERY, {"from": bounds[0][0], "to": bounds[0][1]}
+    else:
+        query = _gh_multi_query(len(windows))
+        variables = {k: v for i, (f, t) in enumerate(bounds) for k, v in ((f"from{i}", f), (f"to{i}", t))}
+
+    resp = _SESSION.post(
+        _GH_URL,
+        json={"query": query, "variables": variables},
+        headers={**_GH_HEADERS, "Authorization": f"Bearer {token}"},
         timeout=25,
     )
     resp.raise_for_status()
     payload = resp.json()
-    if isinstance(payload, dict) and payload.get("errors"):
-        raise RuntimeError(f"GitHub GraphQL errors: {payload['errors']}")
-    weeks = (((payload or {}).get("data") or {}).get("viewer") or {}).get("contributionsCollection", {}).get("contributionCalendar", {}).get("weeks", [])
-    days = [d for w in (weeks or []) for d in (w.get("contributionDays") or [])]
+    aliases = ["contributionsCollection"] if len(windows) == 1 else [f"w{i}" for i in range(len(windows))]
+    # Errors scoped to one alias (path ["viewer", "w3", ...]) only fail that window; anything else fails all
+    failed: set[str] = set()
+    for err in (payload.get("errors") if isinstance(payload, dict) else None) or []:
+        path = (err or {}).get("path") or []
+        if len(path) >= 2 and path[0] == "viewer" and path[1] in aliases:
+            failed.add(path[1])
+        else:
+            raise RuntimeError(f"GitHub GraphQL errors: {payload['errors']}")
+    viewer = ((payload or {}).get("data") or {}).get("viewer") or {}
 
-    # Build day lookup and compute ratio
-    total_days = (end_date - start_date).days + 1
-    total_days = max(1, total_days)
-    lookup: Dict[str, int] = {str(d.get("date")): int(d.get("contributionCount") or 0) for d in (days or [])}
+    out: List[Optional[float]] = []
+    for alias, (start_date, end_date, required_per_day) in zip(aliases, windows):
+        if alias in failed:
+            out.append(None)
+            continue
+        coll = viewer.get(alias) or {}
+        weeks = (coll.get("contributionCalendar") or {}).get("weeks") or []
+        # Count qualifying days in one pass over the returned calendar (ISO dates compare lexicographically)
+        start_iso, end_iso = start_date.isoformat(), end_date.isoformat()
+        met = sum(
+            1
+            for w in weeks
+            for d in (w.get("contributionDays") or [])
+            if start_iso <= str(d.get("date")) <= end_iso and int(d.get("contributionCount") or 0) >= required_per_day
+        )
+        out.append(_met_ratio(met, start_date, end_date))
+    return out
 
-    met = 0
-    cur = start_date
-    while cur <= end_date:
-        if lookup.get(cur.isoformat(), 0) >= required_per_day:
-            met += 1
-        cur += timedelta(days=1)
 
-    return round(met / total_days, 6)
+def _met_ratio(met: int, start_date, end_date) -> float:
+    """Return met / days in [start_date, end_date], rounded to 6 places."""
+    return round(met / max(1, (end_date - start_date).days + 1), 6)
 
 
 def ratio_to_ppm(ratio: float) -> int:
@@ -337,57 +709,56 @@ def _progress_farcaster(
     - Requires settings.NEYNAR_API_KEY to call Neynar REST API.
     - goal_type may include "post_per_day", "cast_per_day", or "per_day" to signal daily requirement.
     """
-    addr_key = lambda a: str(a).lower()
 
-    # Determine window in UTC days
-    if window and window[0] and window[1] and window[1] >= window[0]:
-        start_dt = datetime.fromtimestamp(window[0], tz=timezone.utc).date()
-        end_dt = datetime.fromtimestamp(window[1], tz=timezone.utc).date()
-    else:
-        today = datetime.now(tz=timezone.utc).date()
-        start_dt = end_dt = today
+    start_dt, end_dt = _window_days(window)
 
     # Normalize goal
-    gt = (goal_type or "post_per_day").lower()
-    required_per_day = max(1, int(goal_amount or 1)) if ("post" in gt or "cast" in gt or "per_day" in gt) else 1
+    required_per_day = max(1, int(goal_amount or 1)) if _FARCASTER_DAILY_GOAL.search(goal_type or "post_per_day") else 1
 
     api_key = settings.NEYNAR_API_KEY
-    out: Dict[str, Optional[float]] = {}
-    for p in participants:
-        addr = addr_key(p["participant_address"])
-        fid_or_token = tokens.get(addr)
-        # If missing API key, cannot fetch
-        if not api_key:
-            out[addr] = None
-            continue
-        # Determine fid: prefer numeric token value; else try resolve via address verification
-        fid = None
-        if fid_or_token is not None:
-            try:
-                fid = int(str(fid_or_token).strip())
-            except Exception:
-                fid = None
+
+    def _one(addr: str, fid: Optional[int]) -> Tuple[str, Optional[float]]:
         if fid is None:
-            # Try Neynar verification mapping
+            # Not found in bulk lookup: try Neynar verification mapping
             try:
                 fid = _resolve_farcaster_fid_for_address(api_key, addr)
             except Exception:
                 fid = None
         if fid is None:
-            out[addr] = None
-            continue
+            return addr, None
+        cache_key = ("farcaster", fid, start_dt, end_dt, required_per_day)
+        cached = _cached_ratio(cache_key)
+        if cached is not None:
+            return addr, cached
         try:
             ratio = _farcaster_ratio_for_fid(api_key, fid, start_dt, end_dt, required_per_day)
-            out[addr] = ratio
         except Exception:
-            out[addr] = None
+            return addr, None
+        _store_ratio(cache_key, end_dt, ratio)
+        return addr, ratio
+
+    out: Dict[str, Optional[float]] = {addr_key(p["participant_address"]): None for p in participants}
+    # If missing API key, cannot fetch
+    if not api_key:
+        return out
+    # Determine fid: prefer numeric token value; resolve the rest in bulk by wallet address
+    fids: Dict[str, Optional[int]] = {}
+    for addr in out:
+        try:
+            fids[addr] = int(str(tokens.get(addr)).strip()) if tokens.get(addr) is not None else None
+        except Exception:
+            fids[addr] = None
+    unresolved = [a for a, fid in fids.items() if fid is None]
+    if unresolved:
+        fids.update(_resolve_farcaster_fids_bulk(api_key, unresolved))
+    out.update(_fan_out(_one, list(fids.items())))
     return out
 
 
 def _farcaster_ratio_for_fid(api_key: str, fid: int, start_date, end_date, required_per_day: int) -> float:
     """Return ratio in [0,1] of days meeting the required number of Farcaster casts.
 
-    Uses Neynar API: GET /v2/farcaster/user/casts?fid=...&limit=100&cursor=...
+    Uses Neynar API: GET /v2/farcaster/user/casts?fid=...&limit=150&cursor=...
     Requires header: {"x-api-key": <NEYNAR_API_KEY>}.
     """
     headers = {
@@ -397,19 +768,34 @@ def _farcaster_ratio_for_fid(api_key: str, fid: int, start_date, end_date, requi
         "x-neynar-experimental": "false",
     }
     base_url = settings.FARCASTER_USER_CASTS_URL or "https://api.neynar.com/v2/farcaster/feed/user/casts/"
-    params = {"fid": str(fid), "limit": 100, "include_replies": "true"}
+    page_size = 150  # endpoint maximum
+    params = {"fid": str(fid), "limit": page_size, "include_replies": "true"}
 
-    counts_by_day: Dict[str, int] = {}
-    start_dt_mid = datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc)
+    # Per-day cast counts indexed from the window start; casts are placed by UTC day ordinal
+    total_days = max(0, (end_date - start_date).days + 1)
+    counts = [0] * total_days
+    start_ord = start_date.toordinal()
 
+    global _NEYNAR_THROTTLE_UNTIL
     pages = 0
     cursor = None
+    retried = False
     while pages < 10:  # cap pages
+        if time.monotonic() < _NEYNAR_THROTTLE_UNTIL:
+            # App-wide backoff after a long 429: fail this user (ratio None) instead of spending more budget
+            raise RuntimeError("Neynar rate limit in effect")
         if cursor:
             params["cursor"] = cursor
-        resp = requests.get(base_url, headers=headers, params=params, timeout=20)
+        resp = _SESSION.get(base_url, headers=headers, params=params, timeout=20)
         if resp.status_code == 404:
             break
+        if resp.status_code == 429:
+            wait = _retry_after_sec(resp)
+            if 0 < wait <= _MAX_RETRY_AFTER_SEC and not retried:
+                retried = True
+                time.sleep(wait)
+                continue
+            _NEYNAR_THROTTLE_UNTIL = time.monotonic() + (wait or 60)
         resp.raise_for_status()
         data = resp.json() or {}
         # Some responses may wrap data in a 'result' object
@@ -421,35 +807,17 @@ def _farcaster_ratio_for_fid(api_key: str, fid: int, start_date, end_date, requi
         stop = False
         for c in casts:
             # Try multiple timestamp fields; Neynar may return ISO strings or epoch numbers
-            ts = c.get("timestamp") or c.get("published_at") or c.get("created_at")
-            if not ts:
+            day = _cast_day(c.get("timestamp") or c.get("published_at") or c.get("created_at"))
+            if day is None:
                 continue
-            try:
-                # If ts is numeric (epoch seconds or ms)
-                if isinstance(ts, (int, float)) or (isinstance(ts, str) and str(ts).isdigit()):
-                    val = int(ts)
-                    # Heuristic: >= 10^12 => milliseconds
-                    if val > 1_000_000_000_000:
-                        dt = datetime.fromtimestamp(val / 1000, tz=timezone.utc)
-                    else:
-                        dt = datetime.fromtimestamp(val, tz=timezone.utc)
-                else:
-                    # Assume ISO 8601
-                    dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
-            except Exception:
-                try:
-                    dt = datetime.strptime(str(ts), "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
-                except Exception:
-                    continue
-            if dt < start_dt_mid:
+            if day < start_ord:
                 stop = True
                 break
-            d = dt.date()
-            if d < start_date or d > end_date:
-                continue
-            key = d.isoformat()
-            counts_by_day[key] = counts_by_day.get(key, 0) + 1
-        if stop:
+            idx = day - start_ord
+            if idx < total_days:
+                counts[idx] += 1
+        # Casts come newest-first: stop once past the window start or on a short (last) page
+        if stop or len(casts) < page_size:
             break
         pages += 1
         # Pagination per docs: response contains { next: { cursor: "..." } }
@@ -463,59 +831,185 @@ def _farcaster_ratio_for_fid(api_key: str, fid: int, start_date, end_date, requi
         if not cursor:
             break
 
-    total_days = max(1, (end_date - start_date).days + 1)
-    met = 0
-    cur = start_date
-    while cur <= end_date:
-        if counts_by_day.get(cur.isoformat(), 0) >= required_per_day:
-            met += 1
-        cur += timedelta(days=1)
-    return round(met / total_days, 6)
+    return _met_ratio(sum(1 for c in counts if c >= required_per_day), start_date, end_date)
 
 
-def _resolve_farcaster_fid_for_address(api_key: str, address: str) -> Optional[int]:
-    """Resolve a Farcaster FID from an EVM wallet using Neynar.
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def _iso_day_ordinal(day: str) -> int:
+    return date.fromisoformat(day).toordinal()
+
 
-    Resolution order:
-      1) Bulk-by-address endpoint (recommended by docs)
-      2) Verification-by-address (wallet verified on Farcaster)
+def _cast_day(ts: Any) -> Optional[int]:
+    """UTC day ordinal of a cast timestamp; None if unparseable.
 
-    Returns None if not found or on errors.
+    Fast path for Neynar's usual 'YYYY-MM-DDTHH:MM:SS(.fff)Z' strings: the date prefix already is the
+    UTC day, so nothing else is parsed. Other shapes go through _cast_epoch.
     """
-    addr_lc = str(address).lower()
-    # First: bulk-by-address (ETH/SOL)
-    try:
-        headers = {
-            "accept": "application/json",
-            "x-api-key": api_key,
-            "x-neynar-experimental": "false",
-        }
-        url = "https://api.neynar.com/v2/farcaster/user/bulk-by-address/"
-        resp = requests.get(url, headers=headers, params={"addresses": addr_lc}, timeout=15)
-        if resp.status_code == 404:
+    if isinstance(ts, str) and ts.endswith("Z") and len(ts) > 10 and ts[10] == "T":
+        try:
+            return _iso_day_ordinal(ts[:10])
+        except ValueError:
             pass
-        else:
-            resp.raise_for_status()
-            payload = resp.json() or {}
-            # Response is a mapping: { address_lower: [ { user... }, ... ] }
-            data = payload.get("result", payload) if isinstance(payload, dict) else {}
-            arr = data.get(addr_lc) or data.get(address) or []
-            if isinstance(arr, list) and arr:
-                fid = (arr[0] or {}).get("fid")
-                if fid is not None:
-                    return int(fid)
+    epoch = _cast_epoch(ts)
+    return None if epoch is None else _UNIX_EPOCH_ORDINAL + int(epoch // 86400)
+
+
+def _cast_epoch(ts: Any) -> Optional[float]:
+    """Unix seconds for a cast timestamp (epoch s/ms or ISO 8601; naive treated as UTC); None if unparseable."""
+    if not ts:
+        return None
+    try:
+        # If ts is numeric (epoch seconds or ms)
+        if isinstance(ts, (int, float)) or (isinstance(ts, str) and ts.isdigit()):
+            val = int(ts)
+            # Heuristic: >= 10^12 => milliseconds
+            return val / 1000 if val > 1_000_000_000_000 else float(val)
+        # Assume ISO 8601
+        dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
     except Exception:
-        # Continue to fallback
-        pass
+        try:
+            dt = datetime.strptime(str(ts), "%Y-%m-%dT%H:%M:%S.%fZ")
+        except Exception:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _retry_after_sec(resp) -> int:
+    """Seconds from a Retry-After header given in delta-seconds form; 0 when absent or unparseable."""
+    try:
+        return max(0, int(str(resp.headers.get("Retry-After", "0")).strip()))
+    except (TypeError, ValueError):
+        return 0
 
+
+def _resolve_farcaster_fids_bulk(api_key: str, addresses: List[str]) -> Dict[str, int]:
+    """Resolve Farcaster FIDs for many EVM wallets via Neynar bulk-by-address (recommended by docs).
+
+    Addresses go out in comma-separated chunks of up to 350 (the endpoint limit), concurrently.
+    Returns {address_lower: fid} for the wallets found; failed chunks are simply omitted.
+    """
+    headers = {
+        "accept": "application/json",
+        "x-api-key": api_key,
+        "x-neynar-experimental": "false",
+    }
+    url = "https://api.neynar.com/v2/farcaster/user/bulk-by-address/"
+    out: Dict[str, int] = {}
+    addrs = []
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        for a in dict.fromkeys(addr_key(a) for a in addresses):
+            hit = _FID_CACHE.get(a)
+            if hit and hit[0] > now:
+                out[a] = hit[1]
+            else:
+                addrs.append(a)
+    # Then the persisted mappings still within the TTL, so only new or stale wallets reach Neynar
+    stored = _stored_fids(addrs)
+    with _CACHE_LOCK:
+        _FID_CACHE.update({a: (now + ttl, fid) for a, (fid, ttl) in stored.items()})
+    out.update({a: fid for a, (fid, _) in stored.items()})
+    addrs = [a for a in addrs if a not in stored]
+    chunks = [addrs[i:i + _NEYNAR_BULK_ADDRESSES] for i in range(0, len(addrs), _NEYNAR_BULK_ADDRESSES)]
+
+    def _one(i: int, chunk: List[str]) -> Tuple[int, Dict[str, int]]:
+        try:
+            resp = _SESSION.get(url, headers=headers, params={"addresses": ",".join(chunk)}, timeout=15)
+            # Neynar answers 404 when none of the addresses has a user; other errors just leave the chunk unresolved
+            if resp.status_code >= 400:
+                return i, {}
+            payload = resp.json() or {}
+        except Exception:
+            return i, {}
+        # Response is a mapping: { address_lower: [ { user... }, ... ] }
+        data = payload.get("result", payload) if isinstance(payload, dict) else {}
+        found: Dict[str, int] = {}
+        for addr, arr in (data or {}).items():
+            if isinstance(arr, list) and arr and (arr[0] or {}).get("fid") is not None:
+                found[addr_key(addr)] = int(arr[0]["fid"])
+        return i, found
+
+    resolved: Dict[str, int] = {}
+    for found in _fan_out(_one, list(enumerate(chunks))).values():
+        resolved.update(found)
+    with _CACHE_LOCK:
+        _FID_CACHE.update({a: (now + _FID_TTL_SEC, fid) for a, fid in resolved.items()})
+    _persist_fids(resolved)
+    out.update(resolved)
+    return out
+
+
+def _stored_fids(addrs: List[str]) -> Dict[str, Tuple[int, float]]:
+    """Wallet -> (FID, seconds of TTL left) from the optional farcaster_address_fid table.
+
+    Rows resolved more than _FID_TTL_SEC ago are ignored so they get re-resolved; {} when unavailable.
+    """
+    dal = _dal()
+    if not (addrs and dal) or _FID_TABLE in _UNAVAILABLE_DB_OBJECTS:
+        return {}
+    now = datetime.now(tz=timezone.utc)
+    cutoff = now.timestamp() - _FID_TTL_SEC
+    found: Dict[str, Tuple[int, float]] = {}
+    try:
+        for i in range(0, len(addrs), _FID_QUERY_CHUNK):
+            chunk = addrs[i:i + _FID_QUERY_CHUNK]
+            resp = (
+                dal.client.table(_FID_TABLE)
+                .select("address,fid,resolved_at")
+                .in_("address", chunk)
+                .gte("resolved_at", datetime.fromtimestamp(cutoff, tz=timezone.utc).isoformat())
+                .limit(len(chunk))
+                .execute()
+            )
+            for row in _rows(resp):
+                if row.get("fid") is None:
+                    continue
+                try:
+                    left = datetime.fromisoformat(str(row["resolved_at"])).timestamp() - cutoff
+                except (KeyError, ValueError):
+                    left = 0.0
+                found[addr_key(row["address"])] = (int(row["fid"]), max(0.0, left))
+    except Exception as e:
+        _note_if_missing(_FID_TABLE, e, _MISSING_TABLE_CODES)
+        return {}
+    return found
+
+
+def _persist_fids(fids: Dict[str, int]) -> None:
+    """Best-effort upsert of newly resolved wallet -> FID mappings.
+
+    A failed write (transient error, RLS/permissions) is ignored and never disables the read path.
+    """
+    dal = _dal()
+    if not (fids and dal) or _FID_TABLE in _UNAVAILABLE_DB_OBJECTS:
+        return
+    try:
+        dal.client.table(_FID_TABLE).upsert(
+            [{"address": a, "fid": fid, "resolved_at": datetime.now(tz=timezone.utc).isoformat()} for a, fid in fids.items()],
+            on_conflict="address",
+        ).execute()
+    except Exception as e:
+        _note_if_missing(_FID_TABLE, e, _MISSING_TABLE_CODES)
+
+
+def _resolve_farcaster_fid_for_address(api_key: str, address: str) -> Optional[int]:
+    """Resolve a Farcaster FID for one EVM wallet via Neynar verification-by-address.
+
+    Fallback for wallets the bulk-by-address lookup did not find. Returns None if not found or on errors.
+    """
+    addr_lc = addr_key(address)
     # Fallback: verification-by-address (requires wallet to be verified on profile)
     try:
         headers = {"accept": "application/json", "x-api-key": api_key}
         url = "https://api.neynar.com/v2/farcaster/verification/by-address"
-        resp = requests.get(url, headers=headers, params={"address": addr_lc}, timeout=15)
-        if resp.status_code == 404:
+        resp = _SESSION.get(url, headers=headers, params={"address": addr_lc}, timeout=15)
+        if resp.status_code >= 400:
             return None
-        resp.raise_for_status()
         payload = resp.json() or {}
         users = payload.get("users") or payload.get("result") or []
         if isinstance(users, dict):
@@ -74,6 +74,58 @@ create table if not exists public.user_tokens (
 );
 create index if not exists idx_user_tokens_wallet_lower on public.user_tokens (lower(wallet_address));
 
+-- Progress fetching context in one round-trip: challenge window/goal plus provider tokens
+-- for the given (lowercased) wallets. Used by app/services/progress.py when present.
+create or replace function public.motify_challenge_context(
+	p_challenge_id bigint,
+	p_contract text,
+	p_provider text,
+	p_addrs text[]
+) returns jsonb
+language sql
+stable
+as $$
+	select jsonb_build_object(
+		'meta', (
+			select jsonb_build_object(
+				'start_time', c.start_time,
+				'end_time', c.end_time,
+				'goal_type', c.goal_type,
+				'goal_amount', c.goal_amount
+			)
+			from public.chain_challenges c
+			where c.contract_address = p_contract and c.challenge_id = p_challenge_id
+			limit 1
+		),
+		'tokens', coalesce((
+			select jsonb_agg(jsonb_build_object('wallet_address', t.wallet_address, 'access_token', t.access_token))
+			from public.user_tokens t
+			where t.provider = p_provider and t.wallet_address = any(p_addrs)
+		), '[]'::jsonb)
+	);
+$$;
+-- Returns access tokens: keep it server-side only
+revoke execute on function public.motify_challenge_context(bigint, text, text, text[]) from public, anon, authenticated;
+
+-- Provider tokens for many wallets at once; the array travels in the request body, not the URL.
+create or replace function public.get_user_tokens(p_provider text, p_addrs text[])
+returns table(wallet_address text, access_token text)
+language sql
+stable
+as $$
+	select t.wallet_address, t.access_token
+	from public.user_tokens t
+	where t.provider = p_provider and t.wallet_address = any(p_addrs)
+$$;
+revoke execute on function public.get_user_tokens(text, text[]) from public, anon, authenticated;
+
+-- Wallet -> Farcaster FID resolutions (optional); lets progress fetching skip Neynar lookups for known wallets.
+create table if not exists public.farcaster_address_fid (
+	address text primary key, -- lowercased wallet
+	fid bigint not null,
+	resolved_at timestamptz default now() not null -- mappings older than a day are re-resolved
+);
+
 -- -----------------------------------------------------------------------------
 -- Security: Row Level Security (RLS)
 -- -----------------------------------------------------------------------------
@@ -86,3 +138,4 @@ alter table if exists public.chain_participants enable row level security;
 alter table if exists public.finished_challenges enable row level security;
 alter table if exists public.finished_participants enable row level security;
 alter table if exists public.user_tokens enable row level security;
+alter table if exists public.farcaster_address_fid enable row level security;
@@ -0,0 +1,43 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from eth_utils.abi import get_abi_output_types
+from web3 import Web3
+
+from app.services.chain_reader import ChainReader, load_abi
+
+_ABI = load_abi(str(Path(__file__).resolve().parents[1] / "abi" / "Motify.json"))
+_FN_ABI = next(x for x in _ABI if x.get("name") == "getChallengeById")
+_RECIPIENT = Web3.to_checksum_address("0x" + "ab" * 20)
+_USER = Web3.to_checksum_address("0x" + "cd" * 20)
+# Shape returned by contract .call(): checksummed addresses
+_CHALLENGE = (7, _RECIPIENT, 100, 200, False, "name", "github", "contribution_per_day", 1, "desc", 0, False,
+              [(_USER, 10, 10, 0, False)])
+
+
+def _reader() -> ChainReader:
+    codec = Web3().codec
+    data = codec.encode(get_abi_output_types(_FN_ABI), [_CHALLENGE])
+    aggregate3 = lambda calls: SimpleNamespace(call=lambda: [(True, data) for _ in calls])
+    contract = SimpleNamespace(
+        functions=SimpleNamespace(getChallengeById=lambda cid: SimpleNamespace(call=lambda: _CHALLENGE)),
+        get_function_by_name=lambda name: SimpleNamespace(abi=_FN_ABI),
+        encode_abi=lambda fn_name, args: b"",
+    )
+    reader = ChainReader.__new__(ChainReader)
+    reader.w3 = SimpleNamespace(
+        codec=codec,
+        eth=SimpleNamespace(contract=lambda address, abi: SimpleNamespace(functions=SimpleNamespace(aggregate3=aggregate3))),
+    )
+    reader.contract = contract
+    reader.contract_address = _RECIPIENT
+    reader.abi_path = "abi/Motify.json"
+    return reader
+
+
+def test_multicall_details_match_single_call():
+    reader = _reader()
+    batched = reader.get_challenge_details([7])[7]
+
+    assert batched == reader.get_challenge_detail(7)
+    assert batched["participants"][0]["participant_address"] == _USER
@@ -0,0 +1,127 @@
+import pytest
+
+from app.services.chain_writer import _ppm_to_bps
+
+
+@pytest.mark.parametrize("ppm", [0, 49, 50, 51, 149, 150, 250, 999_950, 1_000_000, -150, -250])
+def test_ppm_to_bps_matches_round(ppm):
+    assert _ppm_to_bps(ppm) == int(round(ppm / 100))
+
+
+def test_ppm_to_bps_full_refund():
+    assert _ppm_to_bps(1_000_000) == 10_000
+
+
+class _FakeProvider:
+    def __init__(self, error_at=()):
+        self.batches = []
+        self.error_at = set(error_at)
+
+    def make_batch_request(self, requests):
+        self.batches.append(requests)
+        return [
+            {"jsonrpc": "2.0", "id": i, "error": {"code": -32000, "message": "nonce too low"}}
+            if i in self.error_at else {"jsonrpc": "2.0", "id": i, "result": "0x" + "00" * 32}
+            for i in range(len(requests))
+        ]
+
+
+def _batched_send(monkeypatch, provider, n_chunks=3, revert_at=None):
+    from types import SimpleNamespace
+
+    from eth_account import Account
+
+    from app.services import chain_writer
+
+    monkeypatch.setattr(chain_writer, "_fee_params", lambda w3: {"gasPrice": 1})
+    monkeypatch.setattr(chain_writer.settings, "GAS_LIMIT", None)
+    account = Account.create()
+
+    def _declare(challenge_id, participants, percentages):
+        def _build(params):
+            # build_transaction estimates gas, which raises when the call would revert
+            if params["nonce"] - 10 == revert_at:
+                raise ValueError("execution reverted: Result already declared for participant")
+            return {"chainId": 8453, "to": "0x" + "11" * 20, "data": "0x" + "ab" * 4, "value": 0, "gas": 90_000, **params}
+        return SimpleNamespace(build_transaction=_build)
+
+    w3 = SimpleNamespace(provider=provider)
+    contract = SimpleNamespace(address="0x" + "11" * 20, functions=SimpleNamespace(declareResults=_declare))
+    chunks = [(["0x" + "22" * 20], [5_000]) for _ in range(n_chunks)]
+    return chain_writer._send_chunks_batched(w3, contract, account, 7, chunks, nonce=10)
+
+
+def test_send_chunks_batched_sends_one_raw_tx_batch(monkeypatch):
+    provider = _FakeProvider()
+    out = _batched_send(monkeypatch, provider)
+
+    assert len(provider.batches) == 1
+    assert [method for method, _ in provider.batches[0]] == ["eth_sendRawTransaction"] * 3
+    assert all(params[0].startswith("0x") for _, params in provider.batches[0])
+    assert len(out["tx_hashes"]) == 3
+
+
+def test_send_chunks_batched_all_rejected_falls_back(monkeypatch):
+    assert _batched_send(monkeypatch, _FakeProvider(error_at={0, 1, 2})) is None
+
+
+def test_send_chunks_batched_partial_accept_raises(monkeypatch):
+    with pytest.raises(RuntimeError, match="partially accepted"):
+        _batched_send(monkeypatch, _FakeProvider(error_at={2}))
+
+
+def test_send_chunks_batched_stops_on_reverting_chunk(monkeypatch):
+    provider = _FakeProvider()
+    with pytest.raises(ValueError, match="Result already declared"):
+        _batched_send(monkeypatch, provider, revert_at=1)
+    assert provider.batches == []
+
+
+def test_checked_receipt_raises_on_revert():
+    from app.services.chain_writer import _checked_receipt
+
+    assert _checked_receipt("0x01", {"status": 1, "gasUsed": 21_000, "blockNumber": 5})["status"] == 1
+    with pytest.raises(RuntimeError, match="reverted"):
+        _checked_receipt("0x02", {"status": 0, "gasUsed": 21_000, "blockNumber": 5})
+
+
+class _FakeEth:
+    def __init__(self, receipts):
+        self.receipts = receipts
+        self.waited = []
+
+    def wait_for_transaction_receipt(self, tx_hash, timeout, poll_latency):
+        self.waited.append(tx_hash)
+        return self.receipts[tx_hash]
+
+
+def _collect(monkeypatch, receipts, tx_hashes):
+    from types import SimpleNamespace
+
+    from app.services import chain_writer
+
+    eth = _FakeEth(receipts)
+    monkeypatch.setattr(chain_writer.settings, "WEB3_RPC_URL", "http://rpc.invalid")
+    monkeypatch.setattr(chain_writer, "_web3", lambda rpc_url: SimpleNamespace(eth=eth))
+    return eth, chain_writer.collect_receipts(tx_hashes, timeout=1, poll_latency=0)
+
+
+def test_collect_receipts_in_input_order(monkeypatch):
+    receipts = {
+        "0xaa": {"status": 1, "gasUsed": 50_000, "blockNumber": 7},
+        "0xbb": {"status": 1, "gasUsed": 60_000, "blockNumber": 8},
+    }
+    eth, out = _collect(monkeypatch, receipts, ["aa", "0xbb"])
+
+    assert eth.waited == ["0xaa", "0xbb"]
+    assert [r["transactionHash"] for r in out] == ["aa", "0xbb"]
+    assert [r["gasUsed"] for r in out] == [50_000, 60_000]
+
+
+def test_collect_receipts_raises_on_revert(monkeypatch):
+    receipts = {
+        "0xaa": {"status": 1, "gasUsed": 50_000, "blockNumber": 7},
+        "0xbb": {"status": 0, "gasUsed": 60_000, "blockNumber": 8},
+    }
+    with pytest.raises(RuntimeError, match="reverted"):
+        _collect(monkeypatch, receipts, ["0xaa", "0xbb"])
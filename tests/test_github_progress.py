@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import progress
+from app.services.progress import fetch_progress_batch
+
+
+pytestmark = pytest.mark.usefixtures("clear_result_cache")
+
+
+def _ts(day: str) -> int:
+    return int(datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp())
+
+
+def _calendar(counts):
+    return {"contributionCalendar": {"weeks": [{"contributionDays": [
+        {"date": d, "contributionCount": c} for d, c in counts.items()
+    ]}]}}
+
+
+# challenge_id -> (window, goal_type, goal_amount)
+_META = {
+    1: ((_ts("2024-01-01"), _ts("2024-01-02")), "contribution_per_day", 1),
+    2: ((_ts("2024-02-01"), _ts("2024-02-04")), "contribution_per_day", 2),
+}
+
+
+@pytest.fixture
+def _github_env(monkeypatch, fake_response):
+    tokens = {"0xaaa": "gh_A", "0xbbb": None}
+    monkeypatch.setattr(progress, "_prime_challenge_context", lambda *a: None)
+    monkeypatch.setattr(progress, "_lookup_tokens", lambda api_type, addrs: {a: tokens.get(a) for a in addrs})
+    monkeypatch.setattr(progress, "_get_challenge_meta", lambda cid: _META[cid])
+    posts = []
+
+    def _use(payload):
+        def _fake_post(url, json=None, headers=None, timeout=None):
+            posts.append(json)
+            return fake_response(200, payload)
+
+        monkeypatch.setattr("app.services.progress._SESSION.post", _fake_post)
+        return posts
+
+    return _use
+
+
+def _challenges():
+    participants = [{"participant_address": "0xAAA"}, {"participant_address": "0xBBB"}]
+    return [(1, participants, "github"), (2, participants, "github")]
+
+
+def test_github_batch_aliases_windows_per_token(_github_env):
+    posts = _github_env({"data": {"viewer": {
+        "w0": _calendar({"2024-01-01": 3, "2024-01-02": 0}),
+        "w1": _calendar({"2024-02-01": 2, "2024-02-02": 2, "2024-02-03": 1, "2024-02-04": 5}),
+    }}})
+
+    out = fetch_progress_batch(_challenges())
+
+    # One POST for the shared token, one alias per challenge window
+    assert len(posts) == 1
+    assert "w0: contributionsCollection" in posts[0]["query"] and "w1: contributionsCollection" in posts[0]["query"]
+    assert posts[0]["variables"]["from1"] == "2024-02-01T00:00:00Z"
+    assert out == {1: {"0xaaa": 0.5, "0xbbb": None}, 2: {"0xaaa": 0.75, "0xbbb": None}}
+
+
+def test_github_batch_graphql_errors_yield_none(_github_env):
+    posts = _github_env({"errors": [{"message": "Bad credentials"}]})
+
+    out = fetch_progress_batch(_challenges())
+
+    assert len(posts) == 1
+    assert out == {1: {"0xaaa": None, "0xbbb": None}, 2: {"0xaaa": None, "0xbbb": None}}
+
+
+def test_github_batch_alias_error_only_fails_that_window(_github_env):
+    _github_env({
+        "data": {"viewer": {"w0": _calendar({"2024-01-01": 1, "2024-01-02": 1}), "w1": None}},
+        "errors": [{"path": ["viewer", "w1"], "message": "The total time spanned by 'from' and 'to' must not exceed 1 year"}],
+    })
+
+    out = fetch_progress_batch(_challenges())
+
+    assert out == {1: {"0xaaa": 1.0, "0xbbb": None}, 2: {"0xaaa": None, "0xbbb": None}}
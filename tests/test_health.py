@@ -1,8 +1,11 @@
-import requests
+import pytest
 
+# /health probes Supabase when configured, and API_BASE_URL points it at a live server
+pytestmark = pytest.mark.integration
 
-def test_health_endpoint(test_api_base_url):
-    r = requests.get(test_api_base_url + "/health", timeout=3)
+
+def test_health_endpoint(api_client):
+    r = api_client.get("/health")
     assert r.status_code == 200
     data = r.json()
     assert data.get("ok") is True
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import indexer
+
+
+class _Query:
+    """Minimal chainable stand-in for the supabase query builder over an in-memory table."""
+
+    def __init__(self, rows, log):
+        self._rows = rows
+        self._log = log
+        self._range = None
+
+    def select(self, *_):
+        return self
+
+    def eq(self, col, val):
+        self._rows = [r for r in self._rows if r.get(col) == val]
+        return self
+
+    def in_(self, col, vals):
+        self._rows = [r for r in self._rows if r.get(col) in vals]
+        return self
+
+    def order(self, col):
+        self._rows = sorted(self._rows, key=lambda r: r[col])
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def execute(self):
+        self._log.append(self._range)
+        rows = self._rows if self._range is None else self._rows[self._range[0]:self._range[1] + 1]
+        return SimpleNamespace(data=rows)
+
+
+def _dal(tables, log):
+    return SimpleNamespace(client=SimpleNamespace(table=lambda name: _Query(list(tables.get(name, [])), log)))
+
+
+def test_participants_by_challenge_pages_past_max_rows(monkeypatch):
+    monkeypatch.setattr(indexer, "_PARTICIPANT_PAGE", 3)
+    contract = indexer.settings.MOTIFY_CONTRACT_ADDRESS
+    rows = [
+        {"contract_address": contract, "challenge_id": cid, "participant_address": f"0x{i:040x}", "amount": 1}
+        for cid in (1, 2) for i in range(4)
+    ]
+    log = []
+
+    grouped = indexer._participants_by_challenge(_dal({"chain_participants": rows}, log), [1, 2])
+
+    assert [len(grouped[1]), len(grouped[2])] == [4, 4]
+    assert log == [(0, 2), (3, 5), (6, 8)]
+
+
+def test_cache_ready_prefetches_details_once(monkeypatch):
+    contract = indexer.settings.MOTIFY_CONTRACT_ADDRESS
+    monkeypatch.setattr(indexer, "_KNOWN_ARCHIVED", set())
+    reads = []
+    reader = SimpleNamespace(get_challenge_details=lambda ids: reads.append(list(ids)) or {cid: {"challenge_id": cid} for cid in ids})
+    monkeypatch.setattr(indexer, "_reader", lambda: reader)
+    calls = {}
+
+    def _fake_cache(cid, *, archived, ready_row, detail):
+        calls[cid] = (archived, detail)
+        return {"challenge_id": cid, "participants_indexed": 0 if archived else 1}
+
+    monkeypatch.setattr(indexer, "cache_participants", _fake_cache)
+    dal = _dal({"finished_challenges": [{"contract_address": contract, "challenge_id": 2}]}, [])
+
+    out = indexer._cache_ready(dal, [{"challenge_id": 1}, {"challenge_id": 2}, {"challenge_id": 3}])
+
+    assert reads == [[1, 3]]
+    assert calls == {1: (False, {"challenge_id": 1}), 2: (True, None), 3: (False, {"challenge_id": 3})}
+    assert [out[cid]["participants_indexed"] for cid in (1, 2, 3)] == [1, 0, 1]
+
+
+def test_archived_ids_remembers_positives(monkeypatch):
+    contract = indexer.settings.MOTIFY_CONTRACT_ADDRESS
+    monkeypatch.setattr(indexer, "_KNOWN_ARCHIVED", set())
+    log = []
+    dal = _dal({"finished_challenges": [{"contract_address": contract, "challenge_id": 5}]}, log)
+
+    assert indexer._archived_ids(dal, [5, 6]) == {5}
+    assert indexer._archived_ids(dal, [5]) == {5}
+    # Second lookup is answered from memory
+    assert len(log) == 1
+
+
+def test_prepare_run_uses_prefetched_inputs(monkeypatch):
+    log = []
+    monkeypatch.setattr(indexer.SupabaseDAL, "from_env", classmethod(lambda cls: _dal({}, log)))
+    monkeypatch.setattr(indexer, "fetch_progress", lambda *a, **k: pytest.fail("progress should be prefetched"))
+    participants = [
+        {"participant_address": "0xAbC", "amount": 10},
+        {"participant_address": "0xDeF", "amount": 20},
+    ]
+
+    out = indexer.prepare_run(
+        3, default_percent_ppm=250_000, participants=participants, api_type="github", ratios={"0xabc": 0.5},
+    )
+
+    assert [(it["user"], it["percent_ppm"]) for it in out["items"]] == [("0xAbC", 500_000), ("0xDeF", 250_000)]
+    assert log == []
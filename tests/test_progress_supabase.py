@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import progress
+
+
+class _APIError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+@pytest.fixture(autouse=True)
+def _reset_unavailable(monkeypatch):
+    monkeypatch.setattr(progress, "_UNAVAILABLE_DB_OBJECTS", set())
+    # The token RPCs are only used with the default user_tokens layout; don't depend on local .env
+    monkeypatch.setattr(progress, "_token_rpc_usable", lambda name: name not in progress._UNAVAILABLE_DB_OBJECTS)
+
+
+def _failing_rpc_dal(exc):
+    def _rpc(name, params):
+        raise exc
+    return SimpleNamespace(client=SimpleNamespace(rpc=_rpc))
+
+
+@pytest.mark.parametrize("exc,disabled", [
+    (_APIError("Could not find the function public.get_user_tokens", code="PGRST202"), True),
+    (_APIError("function get_user_tokens(text, text[]) does not exist", code="42883"), True),
+    (_APIError("upstream request timeout", code="504"), False),
+    (ConnectionResetError("connection reset by peer"), False),
+])
+def test_token_rpc_disabled_only_when_missing(exc, disabled):
+    assert progress._tokens_via_rpc(_failing_rpc_dal(exc), "github", ["0xa"]) is None
+    assert ("get_user_tokens" in progress._UNAVAILABLE_DB_OBJECTS) is disabled
+
+
+def _failing_table_dal(exc):
+    class _Query:
+        def __getattr__(self, name):
+            return lambda *a, **k: self
+
+        def execute(self):
+            raise exc
+    return SimpleNamespace(client=SimpleNamespace(table=lambda name: _Query()))
+
+
+@pytest.mark.parametrize("exc,disabled", [
+    (_APIError("Could not find the table 'public.farcaster_address_fid'", code="PGRST205"), True),
+    (_APIError('relation "public.farcaster_address_fid" does not exist', code="42P01"), True),
+    (_APIError("new row violates row-level security policy", code="42501"), False),
+])
+def test_fid_table_disabled_only_when_missing(monkeypatch, exc, disabled):
+    monkeypatch.setattr(progress, "_dal", lambda: _failing_table_dal(exc))
+
+    progress._persist_fids({"0xa": 1})
+    assert (progress._FID_TABLE in progress._UNAVAILABLE_DB_OBJECTS) is disabled
+    assert progress._stored_fids(["0xa"]) == {}
+    assert (progress._FID_TABLE in progress._UNAVAILABLE_DB_OBJECTS) is disabled
@@ -1,23 +1,16 @@
 import types
 from datetime import datetime, timezone, timedelta
 
-from app.services.progress import _progress_wakatime
-
+import pytest
 
-class _Resp:
-    def __init__(self, status_code=200, payload=None):
-        self.status_code = status_code
-        self._payload = payload or {}
+from app.services import progress
+from app.services.progress import _progress_wakatime
 
-    def json(self):
-        return self._payload
 
-    def raise_for_status(self):
-        if self.status_code >= 400:
-            raise Exception(f"HTTP {self.status_code}")
+pytestmark = pytest.mark.usefixtures("clear_result_cache")
 
 
-def test_wakatime_summaries_uses_cumulative_total(monkeypatch):
+def test_wakatime_summaries_uses_cumulative_total(monkeypatch, fake_response):
     # Arrange: two-day window
     now = datetime.now(timezone.utc)
     start = int((now - timedelta(days=1)).timestamp())
@@ -32,9 +25,9 @@ def test_wakatime_summaries_uses_cumulative_total(monkeypatch):
     }
 
     def _fake_get(url, headers=None, params=None, timeout=None):
-        return _Resp(200, payload)
+        return fake_response(200, payload)
 
-    monkeypatch.setattr("app.services.progress.requests.get", _fake_get)
+    monkeypatch.setattr("app.services.progress._SESSION.get", _fake_get)
 
     participants = [{"participant_address": "0xAbC"}]
     tokens = {"0xabc": "waka_ABC123"}
@@ -46,7 +39,7 @@ def test_wakatime_summaries_uses_cumulative_total(monkeypatch):
     assert out.get("0xabc") == 1.0
 
 
-def test_wakatime_summaries_sums_daily_when_no_cumulative(monkeypatch):
+def test_wakatime_summaries_sums_daily_when_no_cumulative(monkeypatch, fake_response):
     now = datetime.now(timezone.utc)
     start = int((now - timedelta(days=1)).timestamp())
     end = int(now.timestamp())
@@ -61,9 +54,9 @@ def test_wakatime_summaries_sums_daily_when_no_cumulative(monkeypatch):
     }
 
     def _fake_get(url, headers=None, params=None, timeout=None):
-        return _Resp(200, payload)
+        return fake_response(200, payload)
 
-    monkeypatch.setattr("app.services.progress.requests.get", _fake_get)
+    monkeypatch.setattr("app.services.progress._SESSION.get", _fake_get)
 
     participants = [{"participant_address": "0x123"}]
     tokens = {"0x123": "waka_XYZ"}
@@ -71,3 +64,44 @@ def test_wakatime_summaries_sums_daily_when_no_cumulative(monkeypatch):
     out = _progress_wakatime(tokens, participants, window=(start, end), goal_type="coding-time", goal_amount=2)
 
     assert out.get("0x123") == 1.0
+
+
+def test_wakatime_result_is_cached_per_key_and_window(monkeypatch, fake_response):
+    now = datetime.now(timezone.utc)
+    start = int((now - timedelta(days=1)).timestamp())
+    end = int(now.timestamp())
+    calls = []
+
+    def _fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(url)
+        return fake_response(200, {"cumulative_total": {"seconds": 3600.0}})
+
+    monkeypatch.setattr("app.services.progress._SESSION.get", _fake_get)
+
+    participants = [{"participant_address": "0xAbC"}]
+    tokens = {"0xabc": "waka_ABC123"}
+    first = _progress_wakatime(tokens, participants, window=(start, end), goal_type="coding-time", goal_amount=2)
+    second = _progress_wakatime(tokens, participants, window=(start, end), goal_type="coding-time", goal_amount=2)
+
+    assert first == second == {"0xabc": 0.5}
+    assert len(calls) == 1
+
+
+def test_wakatime_shared_api_key_is_fetched_once(monkeypatch, fake_response):
+    now = datetime.now(timezone.utc)
+    start = int((now - timedelta(days=1)).timestamp())
+    end = int(now.timestamp())
+    calls = []
+
+    def _fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(url)
+        return fake_response(200, {"cumulative_total": {"seconds": 7200.0}})
+
+    monkeypatch.setattr("app.services.progress._SESSION.get", _fake_get)
+
+    participants = [{"participant_address": "0xaaa"}, {"participant_address": "0xbbb"}]
+    tokens = {"0xaaa": "waka_TEAM", "0xbbb": "waka_TEAM"}
+    out = _progress_wakatime(tokens, participants, window=(start, end), goal_type="coding-time", goal_amount=4)
+
+    assert out == {"0xaaa": 0.5, "0xbbb": 0.5}
+    assert len(calls) == 1